@@ -0,0 +1,67 @@
+import os
+import time
+import struct
+import argparse
+
+from Crypto.Cipher import AES
+from Crypto.Util.Padding import pad
+
+from fm import decryptor
+from fm.decryptor import CustomDecryptor
+
+
+def best_time(func, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def encrypt_entry(dec, payload, resource_name):
+    """Build a 22 4A 67 file the way the game stores them (hash + payload, AES-CBC)"""
+    hash_val = dec.get_hash_code(payload, 0, len(payload)) & 0xFFFFFFFF
+    body = struct.pack('<I', hash_val) + payload
+    cipher = AES.new(dec.get_mixed_key(resource_name), AES.MODE_CBC, dec.mIV)
+    return bytes([0x22, 0x4A, 0x67, 0x00]) + cipher.encrypt(pad(body, AES.block_size))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Microbenchmark of the Fellow Moon decryptor hash check")
+    parser.add_argument("--sizes", default="0.01,0.1,1,4", help="Payload sizes in MB (default: 0.01,0.1,1,4)")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per measurement, best is reported")
+    parser.add_argument("--no-loop", action="store_true", help="Skip the slow byte-by-byte reference")
+    args = parser.parse_args()
+
+    dec = CustomDecryptor()
+    backend = "numpy" if decryptor.np is not None else "chunked"
+    print(f"get_hash_code backend: {backend}\n")
+    print(f"{'size':>10} {'loop':>10} {'fast':>10} {'speedup':>8} {'decrypt':>10} {'no verify':>10}")
+
+    for size_mb in (float(s) for s in args.sizes.split(",")):
+        payload = os.urandom(int(size_mb * 1024 * 1024))
+        data = b'\0' * 4 + payload
+
+        fast = best_time(lambda data=data, size=len(payload): dec.get_hash_code(data, 4, size), args.repeat)
+        if args.no_loop:
+            loop = None
+        else:
+            loop = best_time(lambda data=data, size=len(payload): dec.get_hash_code_loop(data, 4, size),
+                             args.repeat)
+            if dec.get_hash_code_loop(data, 4, len(payload)) != dec.get_hash_code(data, 4, len(payload)):
+                raise SystemExit(f"Hash mismatch at {size_mb} MB")
+
+        entry = encrypt_entry(dec, payload, "Bench")
+        verified = best_time(lambda entry=entry: dec.decrypt_custom_format(entry, "Bench"), args.repeat)
+        unverified = best_time(lambda entry=entry: dec.decrypt_custom_format(entry, "Bench", verify=False),
+                               args.repeat)
+
+        loop_text = f"{loop * 1000:8.2f}ms" if loop is not None else f"{'-':>10}"
+        speedup = f"{loop / fast:7.1f}x" if loop is not None and fast else f"{'-':>8}"
+        print(f"{size_mb:>8}MB {loop_text} {fast * 1000:8.2f}ms {speedup} "
+              f"{verified * 1000:8.2f}ms {unverified * 1000:8.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
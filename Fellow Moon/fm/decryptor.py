@@ -1,16 +1,48 @@
-
 import struct
 import gzip
 import zlib
+import threading
+from collections import OrderedDict
 from Crypto.Cipher import AES
 from Crypto.Util.Padding import unpad
 
+try:
+    import numpy as np
+except ImportError:
+    np = None  # get_hash_code falls back to the pure Python chunked version
+
+# get_hash_code is h = h * 31 + byte (mod 2**32) over the data, i.e. the
+# polynomial sum(b[i] * 31**(n-1-i)). Chunks are evaluated at C speed and
+# combined with h = h * 31**len(chunk) + chunk_value.
+HASH_MOD = 1 << 32
+HASH_NUMPY_CHUNK = 1 << 16
+HASH_CHUNK = 128
+HASH_LOOP_MAX = 64  # Inputs this short are faster in the plain loop
+
+# Without NumPy a chunk is split per byte into b % 31 and b // 31 base-31
+# digits, so its value is int(r_digits, 31) + 31 * int(q_digits, 31)
+_BASE31_DIGITS = b'0123456789abcdefghijklmnopqrstu'
+_BASE31_LOW = bytes(_BASE31_DIGITS[b % 31] for b in range(256))
+_BASE31_HIGH = bytes(_BASE31_DIGITS[b // 31] for b in range(256))
+
+_hash_weights = None
+
+# Derived keys kept per resource name (many PAKs repeat base names)
+KEY_CACHE_SIZE = 4096
+
 class CustomDecryptor:
     """Handles the custom encryption format starting with 22 4A 67"""
     
-    def __init__(self):
+    def __init__(self, key_cache_size=KEY_CACHE_SIZE):
         self.mIV = bytes.fromhex('00000000000000000000000000000000')
         self.mRawKeys = bytes.fromhex('9964b1b06b038d7fb77db6a754908b73')
+        
+        # resource name -> mixed key, least recently used first
+        self.key_cache_size = key_cache_size
+        self._key_cache = OrderedDict()
+        self._key_lock = threading.Lock()
+        self._key_hits = 0
+        self._key_misses = 0
     
     @staticmethod
     def get_str_upper_hash(in_asset_name):
@@ -37,7 +69,44 @@ class CustomDecryptor:
         
         return bytes(mixed_key)
     
-    def decrypt_custom_format(self, encrypted_data, resource_name):
+    def get_cached_key(self, res_name):
+        """Get the mixed key of a resource name through the LRU cache"""
+        with self._key_lock:
+            mixed_key = self._key_cache.get(res_name)
+            if mixed_key is not None:
+                self._key_hits += 1
+                self._key_cache.move_to_end(res_name)
+                return mixed_key
+            self._key_misses += 1
+        
+        mixed_key = self.get_mixed_key(res_name)
+        
+        with self._key_lock:
+            self._key_cache[res_name] = mixed_key
+            while len(self._key_cache) > self.key_cache_size:
+                self._key_cache.popitem(last=False)
+        return mixed_key
+    
+    def get_key_cache_stats(self):
+        with self._key_lock:
+            lookups = self._key_hits + self._key_misses
+            return {
+                'hits': self._key_hits,
+                'misses': self._key_misses,
+                'size': len(self._key_cache),
+                'hit_rate': self._key_hits / lookups if lookups else 0.0,
+            }
+    
+    def decrypt_cbc(self, ciphertext, res_name):
+        """AES-CBC decrypt with the cached key of res_name"""
+        return AES.new(self.get_cached_key(res_name), AES.MODE_CBC, self.mIV).decrypt(ciphertext)
+    
+    def decrypt_custom_format(self, encrypted_data, resource_name, verify=True):
+        """
+        Decrypt one 22 4A 67 file. With verify=False the leading hash is
+        trusted and dropped without checking it against the payload, which
+        skips hashing the whole file when only the payload is needed.
+        """
         try:
             if len(encrypted_data) < 4:
                 return None
@@ -46,9 +115,7 @@ class CustomDecryptor:
                 return None
             
             flag = encrypted_data[3]
-            mixed_key = self.get_mixed_key(resource_name)
-            cipher = AES.new(mixed_key, AES.MODE_CBC, self.mIV)
-            decrypted = cipher.decrypt(encrypted_data[4:])
+            decrypted = self.decrypt_cbc(encrypted_data[4:], resource_name)
             
             try:
                 decrypted = unpad(decrypted, AES.block_size)
@@ -58,14 +125,17 @@ class CustomDecryptor:
             if len(decrypted) < 4:
                 return None
             
-            stored_hash = struct.unpack('<I', decrypted[0:4])[0]
-            if stored_hash >= 0x80000000:
-                stored_hash -= 0x100000000
-            
-            calculated_hash = self.get_hash_code(decrypted, 4, len(decrypted) - 4)
-            
-            if stored_hash != calculated_hash:
-                result = decrypted
+            if verify:
+                stored_hash = struct.unpack('<I', decrypted[0:4])[0]
+                if stored_hash >= 0x80000000:
+                    stored_hash -= 0x100000000
+                
+                calculated_hash = self.get_hash_code(decrypted, 4, len(decrypted) - 4)
+                
+                if stored_hash != calculated_hash:
+                    result = decrypted
+                else:
+                    result = decrypted[4:]
             else:
                 result = decrypted[4:]
             
@@ -78,7 +148,8 @@ class CustomDecryptor:
             return None
     
     @staticmethod
-    def get_hash_code(in_data, in_pos, in_len):
+    def get_hash_code_loop(in_data, in_pos, in_len):
+        """Reference byte-by-byte version of get_hash_code"""
         hash_val = 0
         for i in range(in_pos, min(in_pos + in_len, len(in_data))):
             hash_val = ((hash_val << 5) - hash_val + in_data[i]) & 0xFFFFFFFF
@@ -88,6 +159,22 @@ class CustomDecryptor:
         
         return hash_val
     
+    @staticmethod
+    def get_hash_code(in_data, in_pos, in_len):
+        end = min(in_pos + in_len, len(in_data))
+        if end - in_pos <= HASH_LOOP_MAX:
+            return CustomDecryptor.get_hash_code_loop(in_data, in_pos, in_len)
+        
+        if np is not None:
+            hash_val = _hash_numpy(in_data, in_pos, end)
+        else:
+            hash_val = _hash_chunked(in_data, in_pos, end)
+        
+        if hash_val >= 0x80000000:
+            hash_val -= 0x100000000
+        
+        return hash_val
+    
     @staticmethod
     def uncompress_data(compressed_data):
         try:
@@ -98,3 +185,40 @@ class CustomDecryptor:
                 return decompressor.decompress(compressed_data)
         except:  # noqa: E722
             return compressed_data
+
+
+def _hash_numpy(data, start, end):
+    """Unsigned get_hash_code of data[start:end] as uint32 dot products per chunk"""
+    global _hash_weights
+    if _hash_weights is None:
+        # 31 ** (HASH_NUMPY_CHUNK - 1 - i), uint32 products wrap mod 2**32
+        powers = np.full(HASH_NUMPY_CHUNK, 31, dtype=np.uint32)
+        powers[0] = 1
+        _hash_weights = np.cumprod(powers, dtype=np.uint32)[::-1].copy()
+    
+    values = np.frombuffer(data, dtype=np.uint8, count=end - start, offset=start)
+    chunk_factor = pow(31, HASH_NUMPY_CHUNK, HASH_MOD)
+    hash_val = 0
+    for pos in range(0, len(values), HASH_NUMPY_CHUNK):
+        chunk = values[pos:pos + HASH_NUMPY_CHUNK]
+        size = len(chunk)
+        weights = _hash_weights[HASH_NUMPY_CHUNK - size:]
+        chunk_val = int((chunk.astype(np.uint32) * weights).sum(dtype=np.uint32))
+        factor = chunk_factor if size == HASH_NUMPY_CHUNK else pow(31, size, HASH_MOD)
+        hash_val = (hash_val * factor + chunk_val) % HASH_MOD
+    return hash_val
+
+def _hash_chunked(data, start, end):
+    """Unsigned get_hash_code of data[start:end] by parsing base-31 digit chunks"""
+    segment = bytes(memoryview(data)[start:end])
+    low = segment.translate(_BASE31_LOW)
+    high = segment.translate(_BASE31_HIGH)
+    
+    # The first chunk takes the remainder so the rest are all HASH_CHUNK long
+    head = len(segment) % HASH_CHUNK or HASH_CHUNK
+    hash_val = (int(low[:head], 31) + 31 * int(high[:head], 31)) % HASH_MOD
+    chunk_factor = pow(31, HASH_CHUNK, HASH_MOD)
+    for pos in range(head, len(segment), HASH_CHUNK):
+        chunk_val = int(low[pos:pos + HASH_CHUNK], 31) + 31 * int(high[pos:pos + HASH_CHUNK], 31)
+        hash_val = (hash_val * chunk_factor + chunk_val) % HASH_MOD
+    return hash_val
@@ -3,23 +3,143 @@ import io
 import struct
 import json
 import zipfile
+import queue
+import shutil
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from fm.decryptor import CustomDecryptor
 import logging
-import time
 from fm.asset import Asset
 from fm.proto_builder import ProtoBuilder
 import UnityPy
 
 log = logging.getLogger(__name__)
 
+FILE_EXTENSIONS = {'luac': '.luac', 'lua': '.lua', 'json': '.json', 'xml': '.xml'}
+
+ZIP_LOCAL_HEADER = struct.Struct('<4s22xHH')
+ZIP_LOCAL_MAGIC = b'PK\x03\x04'
+
+
+class RangeFile(io.RawIOBase):
+    """
+    Read-only seekable view of bytes [start, start + size) of a file on disk.
+
+    A zip member stored without compression is a plain byte range of its
+    archive, so a nested zip can be opened straight from the outer file
+    instead of being read into memory. Each view has its own file handle.
+    """
+
+    def __init__(self, path, start, size):
+        super().__init__()
+        self.path = path
+        self.start = start
+        self.size = size
+        self._file = open(path, 'rb')
+        self._pos = 0
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self._pos
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_SET:
+            pos = offset
+        elif whence == io.SEEK_CUR:
+            pos = self._pos + offset
+        elif whence == io.SEEK_END:
+            pos = self.size + offset
+        else:
+            raise ValueError(f"Invalid whence: {whence}")
+        if pos < 0:
+            raise ValueError("Negative seek position")
+        self._pos = pos
+        return pos
+
+    def read(self, size=-1):
+        remaining = max(0, self.size - self._pos)
+        if size is None or size < 0 or size > remaining:
+            size = remaining
+        if not size:
+            return b''
+        self._file.seek(self.start + self._pos)
+        data = self._file.read(size)
+        self._pos += len(data)
+        return data
+
+    def readinto(self, buffer):
+        data = self.read(len(buffer))
+        buffer[:len(data)] = data
+        return len(data)
+
+    def close(self):
+        if not self.closed:
+            self._file.close()
+        super().close()
+
+
+class ExtractionProgress:
+    """Thread-safe extraction counters, polled by the GUI while a task runs."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.stage = ""
+            self.total = 0
+            self.done = 0
+            self.success = 0
+            self.failed = 0
+
+    def start(self, stage, count):
+        with self.lock:
+            self.stage = stage
+            self.total += count
+
+    def record(self, ok):
+        with self.lock:
+            self.done += 1
+            if ok:
+                self.success += 1
+            else:
+                self.failed += 1
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                'stage': self.stage,
+                'total': self.total,
+                'done': self.done,
+                'success': self.success,
+                'failed': self.failed,
+            }
+
+
 class PakExtractor:
 
-    def __init__(self, xapk_path: str | None = None):
+    def __init__(self, xapk_path: str | None = None, workers: int | None = None,
+                 progress: ExtractionProgress | None = None):
         self.decryptor = CustomDecryptor()
         self.asset_path = r"gameres\assets"
         self.xapk_path = xapk_path
         self.layer_zips: list[zipfile.ZipFile] = []
+        # path -> (layer zip, ZipInfo) over all layers, first layer wins
+        self.layer_index: dict[str, tuple[zipfile.ZipFile, zipfile.ZipInfo]] = {}
+        # Everything opened for the layers (closed in reverse) and temp spill files
+        self._archives: list = []
+        self._spill_files: list[str] = []
+        # AES-CBC and zlib release the GIL, so decryption scales with threads
+        self.workers = workers or min(8, os.cpu_count() or 1)
+        self.progress = progress or ExtractionProgress()
 
         if xapk_path and os.path.exists(xapk_path):
             self._open_nested_archives(xapk_path)
@@ -29,14 +149,14 @@ class PakExtractor:
         """Open XAPK → gameres.apk → assets/*.zip automatically."""
         log.info(f"[+] Opening {xapk_path}")
         outer = zipfile.ZipFile(xapk_path, "r")
+        self._archives.append(outer)
 
         gameres_name = next((n for n in outer.namelist() if n.endswith("gameres.apk")), None)
         if not gameres_name:
             log.info("✗ gameres.apk not found in XAPK")
             return
         log.info(f"  ↳ Found gameres.apk: {gameres_name}")
-        gameres_bytes = outer.read(gameres_name)
-        inner_apk = zipfile.ZipFile(io.BytesIO(gameres_bytes), "r")
+        inner_apk, apk_path, apk_start = self._open_member_zip(outer, xapk_path, 0, gameres_name)
 
         asset_zips = [n for n in inner_apk.namelist() if n.startswith("assets/") and n.endswith(".zip")]
         if not asset_zips:
@@ -45,21 +165,87 @@ class PakExtractor:
         log.info(f"  ↳ Found {len(asset_zips)} asset zip(s): {', '.join(asset_zips)}")
 
         for name in asset_zips:
-            bytes_data = inner_apk.read(name)
-            self.layer_zips.append(zipfile.ZipFile(io.BytesIO(bytes_data), "r"))
+            layer, _, _ = self._open_member_zip(inner_apk, apk_path, apk_start, name)
+            self.layer_zips.append(layer)
+
+        self._build_layer_index()
+        log.info(f"[✓] Loaded {len(self.layer_zips)} nested asset zip(s), {len(self.layer_index)} entries.")
+
+    def _build_layer_index(self):
+        """Map every path in the layer zips to the (zip, ZipInfo) a lookup would hit first."""
+        index = {}
+        for z in self.layer_zips:
+            # Within one zip the last duplicate wins, like z.open(name)
+            layer = {info.filename: info for info in z.infolist()}
+            for name, info in layer.items():
+                index.setdefault(name, (z, info))
+        self.layer_index = index
+
+    def _open_member_zip(self, parent, parent_path, parent_start, name):
+        """
+        Open zip member name of parent (whose bytes start at parent_start of
+        the file parent_path) as a ZipFile without holding it in memory.
+
+        Stored members are read in place through a RangeFile; compressed
+        ones are decompressed once into a temp file. Returns the ZipFile and
+        the (path, start) its bytes live at, for opening members nested in it.
+        """
+        info = parent.getinfo(name)
+        if info.compress_type == zipfile.ZIP_STORED and not info.flag_bits & 0x1:
+            start = parent_start + self._member_data_offset(parent_path, parent_start, info)
+            view = RangeFile(parent_path, start, info.file_size)
+            self._archives.append(view)
+            archive = zipfile.ZipFile(view, "r")
+            self._archives.append(archive)
+            return archive, parent_path, start
+
+        log.info(f"  ↳ {name} is compressed, unpacking to a temp file")
+        fd, spill_path = tempfile.mkstemp(prefix="fm_", suffix=".zip")
+        self._spill_files.append(spill_path)
+        with os.fdopen(fd, "wb") as out, parent.open(info, "r") as src:
+            shutil.copyfileobj(src, out, 1024 * 1024)
+        archive = zipfile.ZipFile(spill_path, "r")
+        self._archives.append(archive)
+        return archive, spill_path, 0
+
+    @staticmethod
+    def _member_data_offset(parent_path, parent_start, info):
+        """Offset of a member's data in its archive (the local header's extra field can differ from the central one)"""
+        with open(parent_path, "rb") as f:
+            f.seek(parent_start + info.header_offset)
+            magic, name_len, extra_len = ZIP_LOCAL_HEADER.unpack(f.read(ZIP_LOCAL_HEADER.size))
+        if magic != ZIP_LOCAL_MAGIC:
+            raise zipfile.BadZipFile(f"Bad local file header for {info.filename}")
+        return info.header_offset + ZIP_LOCAL_HEADER.size + name_len + extra_len
+
+    def close(self):
+        """Close the nested archives and remove temp files."""
+        for archive in reversed(self._archives):
+            archive.close()
+        self._archives.clear()
+        self.layer_zips.clear()
+        self.layer_index = {}
+        for spill_path in self._spill_files:
+            try:
+                os.remove(spill_path)
+            except OSError:
+                pass
+        self._spill_files.clear()
+
+    def __enter__(self):
+        return self
 
-        log.info(f"[✓] Loaded {len(self.layer_zips)} nested asset zip(s).")
+    def __exit__(self, *exc):
+        self.close()
 
     # ------------------------------------------------------------------ #
     def _read_file_bytes(self, path: str) -> bytes:
         """Read bytes from nested zips first, then local disk."""
-        norm = path.replace("\\", "/")
-        for z in self.layer_zips:
-            try:
-                with z.open(norm, "r") as f:
-                    return f.read()
-            except KeyError:
-                continue
+        entry = self.layer_index.get(path.replace("\\", "/"))
+        if entry is not None:
+            z, info = entry
+            with z.open(info, "r") as f:
+                return f.read()
         with open(path, "rb") as f:
             return f.read()
 
@@ -148,14 +334,13 @@ class PakExtractor:
     def parse_index_json(self, index_path='LuaScript_index.json'):
         if self.layer_zips:
             # try to read index.json from zip layers first
-            for z in self.layer_zips:
-                for candidate in [index_path, "assets/Lua/LuaScript_index.json"]:
-                    try:
-                        with z.open(candidate, "r") as f:
-                            log.info(f"[✓] Loaded index from {candidate} in zip")
-                            return list(json.load(f).keys())
-                    except KeyError:
-                        continue
+            for candidate in [index_path, "assets/Lua/LuaScript_index.json"]:
+                entry = self.layer_index.get(candidate)
+                if entry is not None:
+                    z, info = entry
+                    with z.open(info, "r") as f:
+                        log.info(f"[✓] Loaded index from {candidate} in zip")
+                        return list(json.load(f).keys())
         if not os.path.exists(index_path):
             log.info(f"✗ LuaScript_index.json not found at {index_path}")
             return []
@@ -174,9 +359,7 @@ class PakExtractor:
         found_files = []
         if self.layer_zips:
             # search in zip layers
-            zip_names = set()
-            for z in self.layer_zips:
-                zip_names |= set(z.namelist())
+            zip_names = self.layer_index
             for expected in expected_files:
                 for prefix in ["Lua/", "data/", "cache/"]:
                     if prefix + expected in zip_names or expected in zip_names:
@@ -215,19 +398,17 @@ class PakExtractor:
         found_files = []
         
         if self.layer_zips:
-            # Search in zip layers
-            all_names = set()
-            for z in self.layer_zips:
-                all_names |= set(z.namelist())
-            
-            for name in sorted(all_names):
-                if name.endswith('/'):  # Skip directories
+            # Search in zip layers, only the first bytes of each file are read
+            for name in sorted(self.layer_index):
+                z, info = self.layer_index[name]
+                if name.endswith('/') or info.file_size < 3:  # Skip directories
                     continue
                 
                 try:
-                    data = self._read_file_bytes(name)
+                    with z.open(info, "r") as f:
+                        header = f.read(3)
                     # Check for encryption marker at start
-                    if len(data) >= 3 and data[:3] == encrypted_marker:
+                    if header == encrypted_marker:
                         found_files.append(name)
                         log.info(f"  ✓ Encrypted: {name}")
                 except Exception:
@@ -249,6 +430,66 @@ class PakExtractor:
         log.info(f"\nFound {len(found_files)} encrypted files")
         return found_files
 
+    def _run_pipeline(self, items, decrypt, write, stop_event=None):
+        """
+        Decrypt items on the worker pool and hand the results to a writer.
+
+        decrypt(item) runs on the workers; write(item, decrypted, error)
+        runs on a single writer thread, in item order. Submitted work goes
+        through a bounded queue, so only a few decrypted payloads per worker
+        are held in memory at once. Returns False if stop_event interrupted
+        the run.
+        """
+        pending = queue.Queue(maxsize=self.workers * 4)
+
+        def stopped():
+            return stop_event is not None and stop_event.is_set()
+
+        def writer():
+            while True:
+                task = pending.get()
+                if task is None:
+                    return
+                item, future = task
+                if stopped():
+                    future.cancel()
+                    continue
+                try:
+                    decrypted, error = future.result(), None
+                except Exception as e:
+                    decrypted, error = None, e
+                try:
+                    write(item, decrypted, error)
+                except Exception as e:
+                    log.error(f"[!] Failed to write {item}: {e}")
+
+        writer_thread = threading.Thread(target=writer, daemon=True)
+        writer_thread.start()
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            try:
+                for item in items:
+                    if stopped():
+                        break
+                    pending.put((item, pool.submit(decrypt, item)))
+            finally:
+                pending.put(None)
+                writer_thread.join()
+
+        return not stopped()
+
+    @staticmethod
+    def _save_outputs(base_output_dir, output_file_path, file_hash, ext, data):
+        """Write a decrypted file to by_path/ and by_hash/."""
+        output_path = os.path.join(base_output_dir, 'by_path', output_file_path)
+        os.makedirs(os.path.dirname(output_path), exist_ok=True)
+        with open(output_path, 'wb') as f:
+            f.write(data)
+
+        hash_path = os.path.join(base_output_dir, 'by_hash', f"{file_hash}{ext}")
+        os.makedirs(os.path.dirname(hash_path), exist_ok=True)
+        with open(hash_path, 'wb') as f:
+            f.write(data)
+
     def extract_all_from_index(
         self,
         search_dir='.',
@@ -274,6 +515,7 @@ class PakExtractor:
         total_stats = {'total': 0, 'success': 0, 'failed': 0}
         combined_mapping = {}
         file_types = {}
+        self.progress.reset()
 
         # --- Process each PAK ---
         for pak_idx, pak_path in enumerate(pak_files, 1):
@@ -298,66 +540,45 @@ class PakExtractor:
             log.info(f"  Files: {info['count']}")
 
             total_stats['total'] += len(entries)
-
-            for i, (filepath, entry) in enumerate(entries.items(), 1):
-                if stop_event and stop_event.is_set():
-                    log.warning("Extraction aborted inside PAK loop.")
-                    log.info(f"Processed {i-1}/{len(entries)} entries in {pak_name}")
-                    return total_stats, combined_mapping
-
-                # yield every few iterations for UI responsiveness
-                if i % 5 == 0:
-                    time.sleep(0.01)
-
-                file_hash = entry['hash']
-                combined_mapping[str(file_hash)] = filepath
-                if i % 20 == 1 or i == len(entries):
-                    log.info(f"  Progress: [{i}/{len(entries)}]")
-
-                try:
-                    start = entry['offset']
-                    end = start + entry['size']
-                    encrypted_data = pak_data[start:end]
-
-                    if stop_event and stop_event.is_set():
-                        log.warning("Extraction interrupted before decrypting next file.")
-                        return total_stats, combined_mapping
-
-                    resource_name = self.get_resource_name(filepath)
-                    decrypted = self.decryptor.decrypt_custom_format(encrypted_data, resource_name)
-
-                    if stop_event and stop_event.is_set():
-                        log.warning("Extraction interrupted during decryption.")
-                        return total_stats, combined_mapping
-
-                    if decrypted:
-                        file_type = self.detect_file_type(decrypted)
-                        file_types[file_type] = file_types.get(file_type, 0) + 1
-                        ext = {'luac': '.luac', 'lua': '.lua', 'json': '.json', 'xml': '.xml'}.get(file_type, '.bin')
-
-                        output_path = os.path.join(base_output_dir, 'by_path', filepath + ext)
-                        os.makedirs(os.path.dirname(output_path), exist_ok=True)
-                        with open(output_path, 'wb') as f:
-                            f.write(decrypted)
-
-                        if stop_event and stop_event.is_set():
-                            log.warning("Extraction interrupted during write.")
-                            return total_stats, combined_mapping
-
-                        hash_path = os.path.join(base_output_dir, 'by_hash', f"{file_hash}{ext}")
-                        os.makedirs(os.path.dirname(hash_path), exist_ok=True)
-                        with open(hash_path, 'wb') as f:
-                            f.write(decrypted)
-
-                        total_stats['success'] += 1
-                    else:
+            self.progress.start(pak_name, len(entries))
+            for filepath, entry in entries.items():
+                combined_mapping[str(entry['hash'])] = filepath
+
+            def decrypt_entry(item, pak_data=pak_data):
+                _, filepath, entry = item
+                start = entry['offset']
+                encrypted_data = pak_data[start:start + entry['size']]
+                return self.decryptor.decrypt_custom_format(encrypted_data, self.get_resource_name(filepath))
+
+            def write_entry(item, decrypted, error, entry_count=len(entries)):
+                i, filepath, entry = item
+                if i % 20 == 1 or i == entry_count:
+                    log.info(f"  Progress: [{i}/{entry_count}]")
+
+                if error is not None:
+                    total_stats['failed'] += 1
+                    log.error(f"[!] Failed to extract {filepath}: {error}")
+                elif decrypted:
+                    file_type = self.detect_file_type(decrypted)
+                    file_types[file_type] = file_types.get(file_type, 0) + 1
+                    ext = FILE_EXTENSIONS.get(file_type, '.bin')
+                    try:
+                        self._save_outputs(base_output_dir, filepath + ext, entry['hash'], ext, decrypted)
+                    except Exception as e:
                         total_stats['failed'] += 1
-
-                except Exception as e:
+                        self.progress.record(False)
+                        log.error(f"[!] Failed to extract {filepath}: {e}")
+                        return
+                    total_stats['success'] += 1
+                else:
                     total_stats['failed'] += 1
-                    log.error(f"[!] Failed to extract {filepath}: {e}")
+                self.progress.record(error is None and bool(decrypted))
 
-            time.sleep(0.01)  # small yield after each PAK
+            items = ((i, filepath, entry) for i, (filepath, entry) in enumerate(entries.items(), 1))
+            if not self._run_pipeline(items, decrypt_entry, write_entry, stop_event):
+                log.warning("Extraction aborted inside PAK loop.")
+                log.info(f"Processed {self.progress.done}/{self.progress.total} entries")
+                return total_stats, combined_mapping
 
         # --- Optional recursive pass ---
         if include_recursive and not (stop_event and stop_event.is_set()):
@@ -373,58 +594,46 @@ class PakExtractor:
                 log.info(f"\n{'='*70}")
                 log.info(f"EXTRACTING {len(new_files)} ADDITIONAL ENCRYPTED FILES")
                 log.info(f"{'='*70}")
+                self.progress.start("additional files", len(new_files))
 
-                for file_idx, file_path in enumerate(new_files, 1):
-                    if stop_event and stop_event.is_set():
-                        log.warning("Extraction aborted during additional file search.")
-                        log.info(f"Processed {file_idx-1}/{len(new_files)} extra files.")
-                        return total_stats, combined_mapping
+                def decrypt_file(file_path):
+                    file_data = self._read_file_bytes(file_path)
+                    return self.decryptor.decrypt_custom_format(file_data, self.get_resource_name(file_path))
 
-                    if file_idx % 3 == 0:
-                        time.sleep(0.01)
+                def write_file(file_path, decrypted, error):
+                    total_stats['total'] += 1
+                    if error is not None:
+                        log.info(f"  ✗ Error: {error}")
+                        total_stats['failed'] += 1
+                    elif decrypted:
+                        file_hash = self.get_string_hash(file_path)
+                        combined_mapping[str(file_hash)] = file_path
+                        file_type = self.detect_file_type(decrypted)
+                        file_types[file_type] = file_types.get(file_type, 0) + 1
+                        ext = FILE_EXTENSIONS.get(file_type, '.bin')
 
-                    try:
-                        file_data = self._read_file_bytes(file_path)
-                        resource_name = self.get_resource_name(file_path)
-                        decrypted = self.decryptor.decrypt_custom_format(file_data, resource_name)
-
-                        if stop_event and stop_event.is_set():
-                            log.warning("Extraction interrupted during extra file decryption.")
-                            return total_stats, combined_mapping
-
-                        if decrypted:
-                            file_hash = self.get_string_hash(file_path)
-                            combined_mapping[str(file_hash)] = file_path
-                            file_type = self.detect_file_type(decrypted)
-                            file_types[file_type] = file_types.get(file_type, 0) + 1
-                            ext = {'luac': '.luac', 'lua': '.lua', 'json': '.json', 'xml': '.xml'}.get(file_type, '.bin')
-
-                            output_file_path = file_path
-                            if file_type == 'luac' and file_path.endswith('.lua'):
-                                output_file_path = file_path[:-4] + '.luac'
-
-                            output_path = os.path.join(base_output_dir, 'by_path', output_file_path)
-                            os.makedirs(os.path.dirname(output_path), exist_ok=True)
-                            with open(output_path, 'wb') as f:
-                                f.write(decrypted)
-
-                            hash_path = os.path.join(base_output_dir, 'by_hash', f"{file_hash}{ext}")
-                            os.makedirs(os.path.dirname(hash_path), exist_ok=True)
-                            with open(hash_path, 'wb') as f:
-                                f.write(decrypted)
-
-                            log.info(f"  ✓ Decrypted as {file_type} → {os.path.basename(output_file_path)}")
-                            total_stats['total'] += 1
-                            total_stats['success'] += 1
-                        else:
-                            log.info("  ✗ Decryption failed")
-                            total_stats['total'] += 1
-                            total_stats['failed'] += 1
+                        output_file_path = file_path
+                        if file_type == 'luac' and file_path.endswith('.lua'):
+                            output_file_path = file_path[:-4] + '.luac'
 
-                    except Exception as e:
-                        log.info(f"  ✗ Error: {e}")
-                        total_stats['total'] += 1
+                        try:
+                            self._save_outputs(base_output_dir, output_file_path, file_hash, ext, decrypted)
+                        except Exception as e:
+                            log.info(f"  ✗ Error: {e}")
+                            total_stats['failed'] += 1
+                            self.progress.record(False)
+                            return
+                        log.info(f"  ✓ Decrypted as {file_type} → {os.path.basename(output_file_path)}")
+                        total_stats['success'] += 1
+                    else:
+                        log.info("  ✗ Decryption failed")
                         total_stats['failed'] += 1
+                    self.progress.record(error is None and bool(decrypted))
+
+                if not self._run_pipeline(new_files, decrypt_file, write_file, stop_event):
+                    log.warning("Extraction aborted during additional file search.")
+                    log.info(f"Processed {self.progress.done}/{self.progress.total} files.")
+                    return total_stats, combined_mapping
             else:
                 log.warning("\n✓ No additional encrypted files found")
 
@@ -457,6 +666,10 @@ class PakExtractor:
         if total_stats['total'] > 0:
             log.info(f"Success rate:     {total_stats['success']/total_stats['total']*100:.1f}%")
 
+        key_stats = self.decryptor.get_key_cache_stats()
+        log.info(f"Key cache:        {key_stats['hits']} hits, {key_stats['misses']} misses "
+                 f"({key_stats['hit_rate']*100:.1f}% hit rate)")
+
         if file_types:
             log.info("\nFile types:")
             for ftype, count in sorted(file_types.items(), key=lambda x: -x[1]):
@@ -9,7 +9,7 @@ import os
 import logging
 
 
-from fm.extractor import PakExtractor
+from fm.extractor import PakExtractor, ExtractionProgress
 from fm.metadata import Metadata
 from fm.unluac import UnluacBatch
 from fm.downloader import Downloader
@@ -123,7 +123,7 @@ def run_lua(cfg, stop_event=None):
     except Exception as e:
         logger.exception(f"Lua decompiler failed: {e}")
 
-def run_extractor(cfg, stop_event=None):
+def run_extractor(cfg, stop_event=None, progress=None):
     try:
         if stop_event and stop_event.is_set():
             logger.warning("Task aborted before start.")
@@ -133,13 +133,14 @@ def run_extractor(cfg, stop_event=None):
         md_cfg = cfg.get("METADATA_CONFIG", {})
         logger.info("Running PakExtractor...")
 
-        PakExtractor(md_cfg.get("xapk_path")).extract_all_from_index(
-            search_dir=ex_cfg.get("search_dir", ""),
-            index_path=ex_cfg.get("index_path", ""),
-            base_output_dir=ex_cfg.get("output_path", ""),
-            save_encrypted=ex_cfg.get("save_encrypted", False),
-            stop_event=stop_event,              
-        )
+        with PakExtractor(md_cfg.get("xapk_path"), workers=ex_cfg.get("workers"), progress=progress) as extractor:
+            extractor.extract_all_from_index(
+                search_dir=ex_cfg.get("search_dir", ""),
+                index_path=ex_cfg.get("index_path", ""),
+                base_output_dir=ex_cfg.get("output_path", ""),
+                save_encrypted=ex_cfg.get("save_encrypted", False),
+                stop_event=stop_event,              
+            )
 
         if stop_event and stop_event.is_set():
             logger.warning("Extraction aborted by user.")
@@ -286,6 +287,8 @@ class FellowMoonGUI:
 
         self.current_thread = None
         self.stop_event = threading.Event()
+        self.extract_progress = ExtractionProgress()
+        self.status_text = tk.StringVar(value="")
 
         self.log_text = scrolledtext.ScrolledText(root, wrap=tk.WORD, height=25)
 
@@ -293,6 +296,7 @@ class FellowMoonGUI:
         self._setup_logger()
 
         self.root.protocol("WM_DELETE_WINDOW", self._on_close)
+        self._poll_progress()
 
         try:
             cfg = load_config("config.json")
@@ -346,7 +350,19 @@ class FellowMoonGUI:
         btn_frame.pack(pady=10)
 
 
-        tk.Button(btn_frame, text="Extract Lua (1)", width=15, command=lambda: self._run_task(run_extractor)).grid(row=0, column=1, padx=5, pady=5)
+        tk.Button(
+            btn_frame,
+            text="Extract Lua (1)",
+            width=15,
+            command=lambda: self._run_task(
+                lambda cfg, stop_event=None: run_extractor(
+                    cfg,
+                    stop_event=stop_event,
+                    progress=self.extract_progress
+                ),
+                name="run_extractor"
+            )
+        ).grid(row=0, column=1, padx=5, pady=5)
         tk.Button(btn_frame, text="Decrypt Lua (2)", width=15, command=lambda: self._run_task(run_lua)).grid(row=1, column=1, padx=5, pady=5)
 
         tk.Button(
@@ -378,6 +394,9 @@ class FellowMoonGUI:
         
 
 
+        # --- Extraction progress ---
+        tk.Label(self.root, textvariable=self.status_text, anchor="w").pack(fill="x", padx=10)
+
         # Define fonts
         header_font = tkfont.Font(family="Arial", size=11, weight="bold")
         body_font   = tkfont.Font(family="Ariel", size=12, weight="bold")
@@ -509,6 +528,20 @@ class FellowMoonGUI:
         self.current_thread = threading.Thread(target=task_wrapper, daemon=True)
         self.current_thread.start()
 
+    def _poll_progress(self):
+        """Show the extractor's progress counters while a task runs."""
+        progress = self.extract_progress.snapshot()
+        if progress['total'] and self.current_thread and self.current_thread.is_alive():
+            self.status_text.set(
+                f"Extracting {progress['stage']}: {progress['done']}/{progress['total']} "
+                f"({progress['failed']} failed)"
+            )
+        elif progress['total']:
+            self.status_text.set(
+                f"Extracted {progress['success']}/{progress['total']} files ({progress['failed']} failed)"
+            )
+        self.root.after(250, self._poll_progress)
+
     def _stop_task(self):
         """Signal current thread to stop."""
         if self.current_thread and self.current_thread.is_alive():
@@ -1,22 +1,44 @@
 # batch_parse.py
 import os
 import sys
-import csv
 import json
 import shutil
+import hashlib
+import argparse
 from datetime import datetime
+from contextlib import nullcontext
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
 from binary_table import BinaryTable
+import export
+from export import EXPORT_FORMATS, export_stream
+from idindex import INDEX_NAME, build_id_index
+from parse_profile import merge_profiles, slowest_tables
+from watch import TreeWatcher
 
-def write_tsv(outpath, table):
-    """Write table to TSV file"""
-    with open(outpath, "w", encoding="utf-8", newline="") as f:
-        w = csv.writer(f, delimiter="\t")
-        w.writerow(table.get_column_names())
-        for row in table.get_rows():
-            w.writerow([row.get(col, "") for col in table.get_column_names()])
+# Rough peak memory of the in-memory parse per input byte (raw bytes, decoded
+# varints and row dicts); --max-memory divides by this to get the file size
+# above which the streaming path is used
+MEMORY_PER_INPUT_BYTE = 10
 
-def parse_single_file(input_path, input_base_dir, output_base_dir, verbose=False):
-    """Parse a single .tab.bytes file and return success status"""
+def temp_path_for(final_path):
+    """
+    Temp file next to final_path, unique per call (process id and a random
+    token) so concurrent runs, threads or hosts sharing the output don't clash
+    """
+    directory, name = os.path.split(final_path)
+    return os.path.join(directory, f".{name}.{os.getpid()}.{os.urandom(4).hex()}.tmp")
+
+def parse_single_file(input_path, input_base_dir, output_base_dir, verbose=False, output_format='tsv', profile=False,
+                      stream_threshold=None):
+    """
+    Parse a single .tab.bytes file and return success status (with a parse profile if asked).
+    
+    Inputs larger than stream_threshold bytes are mapped instead of read and
+    decoded row by row straight into the output (BinaryTable low_memory).
+    """
+    temp_output = None
+    table = None
     try:
         # Get file size before
         input_size = os.path.getsize(input_path)
@@ -25,8 +47,10 @@ def parse_single_file(input_path, input_base_dir, output_base_dir, verbose=False
             print(f"\nProcessing: {input_path}")
             print(f"  Input size: {input_size:,} bytes")
         
-        # Parse the table
-        table = BinaryTable(input_path).load()
+        # Parse the header, rows are decoded while the TSV is written
+        streamed = stream_threshold is not None and input_size > stream_threshold
+        table = BinaryTable(input_path, use_mmap=streamed, profile=profile, low_memory=streamed)
+        table.load_header()
         
         # Calculate relative path from input base directory
         relative_path = os.path.relpath(input_path, input_base_dir)
@@ -34,24 +58,22 @@ def parse_single_file(input_path, input_base_dir, output_base_dir, verbose=False
         
         # Generate output path preserving directory structure
         filename = os.path.basename(input_path)
-        output_filename = filename.replace('.tab.bytes', '.tsv')
+        output_filename = filename.replace('.tab.bytes', EXPORT_FORMATS[output_format])
         output_dir = os.path.join(output_base_dir, relative_dir)
+        final_output = os.path.join(output_dir, output_filename)
         
         # Create output directory
         os.makedirs(output_dir, exist_ok=True)
         
-        temp_output = output_filename
-        
-        # Check if input was already a TSV
-        with open(input_path, 'rb') as f:
-            first_bytes = f.read(10)
+        # Written next to the final file, renamed into place once it passes
+        temp_output = temp_path_for(final_output)
         
-        is_already_tsv = first_bytes.startswith(b'Name\t') or first_bytes.startswith(b'Name\x09')
-        
-        if is_already_tsv:
-            # Just copy the file directly
-            final_output = os.path.join(output_dir, output_filename)
-            shutil.copy2(input_path, final_output)
+        if table.is_tsv:
+            # Input was already a TSV, just copy the file directly (as .tsv for every format)
+            final_output = os.path.join(output_dir, filename.replace('.tab.bytes', '.tsv'))
+            temp_output = temp_path_for(final_output)
+            shutil.copy2(input_path, temp_output)
+            os.replace(temp_output, final_output)
             
             return {
                 'success': True,
@@ -61,45 +83,45 @@ def parse_single_file(input_path, input_base_dir, output_base_dir, verbose=False
                 'input_size': input_size,
                 'output_size': input_size,
                 'output_path': final_output,
-                'relative_path': relative_path
+                'relative_path': relative_path,
+                'profile': table.get_profile(),
+                'streamed': streamed
             }
         
-        # Write TSV
-        write_tsv(temp_output, table)
-        
-        # Check output size
-        output_size = os.path.getsize(temp_output)
+        # Write TSV (or another export format); row decoding is profiled on its own
+        write_phase = table.profile.phase('write') if profile else nullcontext()
+        with write_phase, open(temp_output, "xb") as f:
+            output_size, rows_parsed = export_stream(f, table, output_format)
         
         if verbose:
             print(f"  Output size: {output_size:,} bytes")
-            print(f"  Rows parsed: {len(table.rows)}")
+            print(f"  Rows parsed: {rows_parsed}")
         
         # Determine success based on multiple criteria
-        if len(table.rows) == 0 and table.row_count == 0:
+        if rows_parsed == 0 and table.row_count == 0:
             success = True
             status = "PASS (empty table)"
         elif output_size > input_size:
             success = True
             status = "PASS"
-        elif table.row_count > 0 and len(table.rows) == table.row_count:
+        elif table.row_count > 0 and rows_parsed == table.row_count:
             success = True
             status = "PASS (complete)"
-        elif len(table.rows) > 0 and output_size >= 50:
+        elif rows_parsed > 0 and output_size >= 50:
             success = True
             status = "PASS"
         else:
             success = False
-            if len(table.rows) == 0:
+            if rows_parsed == 0:
                 status = "FAIL - no rows parsed"
                 error = "Failed to parse any rows from non-empty file"
             else:
                 status = "FAIL - incomplete parse"
-                error = f"Parsed {len(table.rows)}/{table.row_count} rows, output too small"
+                error = f"Parsed {rows_parsed}/{table.row_count} rows, output too small"
         
         if success:
-            # Move to output directory
-            final_output = os.path.join(output_dir, output_filename)
-            shutil.move(temp_output, final_output)
+            # Atomically move into place
+            os.replace(temp_output, final_output)
             
             if verbose:
                 print(f"  Status: ✓ {status}")
@@ -108,30 +130,30 @@ def parse_single_file(input_path, input_base_dir, output_base_dir, verbose=False
             return {
                 'success': True,
                 'status': status,
-                'rows': len(table.rows),
+                'rows': rows_parsed,
                 'columns': len(table.columns),
                 'input_size': input_size,
                 'output_size': output_size,
                 'output_path': final_output,
-                'relative_path': relative_path
+                'relative_path': relative_path,
+                'profile': table.get_profile(),
+                'streamed': streamed
             }
         else:
-            # Remove failed output
-            if os.path.exists(temp_output):
-                os.remove(temp_output)
-            
             if verbose:
                 print(f"  Status: ✗ {status}")
             
             return {
                 'success': False,
                 'status': status,
-                'rows': len(table.rows),
+                'rows': rows_parsed,
                 'columns': len(table.columns),
                 'input_size': input_size,
                 'output_size': output_size,
                 'error': error,
-                'relative_path': relative_path
+                'relative_path': relative_path,
+                'profile': table.get_profile(),
+                'streamed': streamed
             }
             
     except Exception as e:
@@ -139,35 +161,191 @@ def parse_single_file(input_path, input_base_dir, output_base_dir, verbose=False
         if verbose:
             print(f"  Status: ✗ {status}")
         
-        # Clean up temp file if it exists
-        filename = os.path.basename(input_path)
-        temp_output = filename.replace('.tab.bytes', '.tsv')
-        if os.path.exists(temp_output):
-            os.remove(temp_output)
-        
-        relative_path = os.path.relpath(input_path, input_base_dir)
+        return error_result(input_path, input_base_dir, str(e))
+    
+    finally:
+        # Release the mapping of a streamed input
+        if table is not None:
+            table.close()
         
-        return {
-            'success': False,
-            'status': 'ERROR',
-            'rows': 0,
-            'columns': 0,
-            'input_size': os.path.getsize(input_path) if os.path.exists(input_path) else 0,
-            'output_size': 0,
-            'error': str(e),
-            'relative_path': relative_path
+        # Remove failed or partial output
+        if temp_output and os.path.exists(temp_output):
+            os.remove(temp_output)
+
+def error_result(input_path, input_base_dir, error):
+    """Result of an input that raised (or took its worker process down)"""
+    return {
+        'success': False,
+        'status': 'ERROR',
+        'rows': 0,
+        'columns': 0,
+        'input_size': os.path.getsize(input_path) if os.path.exists(input_path) else 0,
+        'output_size': 0,
+        'error': error,
+        'relative_path': os.path.relpath(input_path, input_base_dir)
+    }
+
+MANIFEST_NAME = 'parse_manifest.json'
+
+def file_sha1(path):
+    """Hash a file's content in chunks"""
+    h = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+def load_manifest(output_dir):
+    """Load the manifest of a previous run, or an empty one"""
+    try:
+        with open(os.path.join(output_dir, MANIFEST_NAME), 'r', encoding='utf-8') as f:
+            return json.load(f).get('files', {})
+    except (OSError, ValueError):
+        return {}
+
+def save_manifest(output_dir, files):
+    """Write the manifest next to parse_results.json"""
+    os.makedirs(output_dir, exist_ok=True)
+    with open(os.path.join(output_dir, MANIFEST_NAME), 'w', encoding='utf-8') as f:
+        json.dump({'files': files}, f, indent=2, ensure_ascii=False)
+
+def check_manifest(record, filepath, output_format='tsv'):
+    """
+    Compare an input against its manifest record.
+    
+    Returns (state, fingerprint) where state is 'unchanged', 'changed' or
+    'new'. Size and mtime are checked first; the content hash is only
+    computed when they differ. Inputs whose output is gone or that were
+    exported in another format count as changed. Only passed inputs are
+    kept in the manifest, so one that failed last time has no record and
+    comes back as new.
+    """
+    stat = os.stat(filepath)
+    fingerprint = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'format': output_format}
+    
+    if not record:
+        fingerprint['sha1'] = file_sha1(filepath)
+        return 'new', fingerprint
+    
+    if record.get('size') == stat.st_size and record.get('mtime_ns') == stat.st_mtime_ns:
+        fingerprint['sha1'] = record.get('sha1')
+    else:
+        fingerprint['sha1'] = file_sha1(filepath)
+    
+    entry = record.get('entry') or {}
+    output_path = entry.get('output_path')
+    if (fingerprint['sha1'] == record.get('sha1') and output_path
+            and record.get('format', 'tsv') == output_format
+            and os.path.exists(output_path)):
+        return 'unchanged', fingerprint
+    
+    return 'changed', fingerprint
+
+def pool_results(tab_files, indexes, input_dir, output_dir, jobs, options, lost):
+    """
+    Run indexes of tab_files in a worker pool and yield (index, result) as they
+    complete. Inputs whose worker pool broke (a worker was killed or crashed)
+    are appended to lost instead, any other exception becomes an error result.
+    """
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        futures = {
+            pool.submit(parse_single_file, tab_files[i], input_dir, output_dir, *options): i
+            for i in indexes
         }
+        for future in as_completed(futures):
+            i = futures[future]
+            try:
+                yield i, future.result()
+            except BrokenProcessPool:
+                lost.append(i)
+            except Exception as e:
+                yield i, error_result(tab_files[i], input_dir, f"{type(e).__name__}: {e}")
+
+def process_files(tab_files, input_dir, output_dir, jobs=1, output_format='tsv', profile=False,
+                  stream_threshold=None):
+    """
+    Parse files and yield (index, filepath, result) in input order.
+    
+    When a worker process dies every input still queued on that pool is lost
+    with it; those are re-run one per fresh single-worker pool so the input
+    that kills its worker is the only one reported as failed.
+    """
+    options = (False, output_format, profile, stream_threshold)
+    if jobs <= 1:
+        for i, filepath in enumerate(tab_files):
+            yield i, filepath, parse_single_file(filepath, input_dir, output_dir, *options)
+        return
+    
+    # Schedule the largest files first so one big table doesn't finish last
+    order = sorted(range(len(tab_files)), key=lambda i: os.path.getsize(tab_files[i]), reverse=True)
+    lost = []
+    
+    # Hold back results that complete early so output stays in input order
+    pending = {}
+    next_index = 0
+    for i, result in pool_results(tab_files, order, input_dir, output_dir, jobs, options, lost):
+        pending[i] = result
+        while next_index in pending:
+            yield next_index, tab_files[next_index], pending.pop(next_index)
+            next_index += 1
+    
+    for i in sorted(lost):
+        retry_lost = []
+        for _, result in pool_results(tab_files, [i], input_dir, output_dir, 1, options, retry_lost):
+            pending[i] = result
+        if retry_lost:
+            pending[i] = error_result(tab_files[i], input_dir, "Worker process terminated abruptly")
+        while next_index in pending:
+            yield next_index, tab_files[next_index], pending.pop(next_index)
+            next_index += 1
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        description="Convert .tab.bytes files to .tsv",
+        epilog="Directory structure will be preserved from input to output",
+    )
+    parser.add_argument("input_directory", help="Directory containing .tab.bytes files")
+    parser.add_argument("output_directory", nargs="?", default="./parsed_tables",
+                        help="Base directory for output (default: './parsed_tables')")
+    parser.add_argument("-j", "--jobs", type=int, default=1,
+                        help="Number of worker processes (0 = one per CPU, default: 1)")
+    parser.add_argument("--format", choices=sorted(EXPORT_FORMATS), default="tsv",
+                        help="Output format: tsv, parquet/arrow (needs pyarrow) or native "
+                             "(typed columnar .pgrc, no dependencies). Default: tsv")
+    parser.add_argument("-f", "--force", action="store_true",
+                        help=f"Re-parse every file, ignoring {MANIFEST_NAME}")
+    parser.add_argument("--max-memory", type=int, metavar="MB",
+                        help="Memory budget per worker in MB: inputs larger than MB/"
+                             f"{MEMORY_PER_INPUT_BYTE} are mapped and streamed row by row into the output "
+                             "(bounded for TSV; parquet/arrow/native still collect typed columns)")
+    parser.add_argument("--profile", action="store_true",
+                        help="Record per-phase parse timings in parse_results.json and list the slowest tables")
+    parser.add_argument("--watch", action="store_true",
+                        help="After the initial run, keep watching the input tree and convert new or "
+                             "modified files as they appear (inotify, polling fallback)")
+    parser.add_argument("--debounce", type=float, default=2.0,
+                        help="Watch mode: seconds without new changes before a batch is converted (default: 2)")
+    parser.add_argument("--id-index", action="store_true",
+                        help=f"After parsing, build {INDEX_NAME} (Id -> table, row offset) over the passed tables")
+    return parser
 
 def main():
+    parser = build_parser()
     if len(sys.argv) < 2:
-        print("Usage: python batch.py <input_directory> [output_directory]")
-        print("  input_directory: Directory containing .tab.bytes files")
-        print("  output_directory: Base directory for output (default: './parsed_tables')")
-        print("\nDirectory structure will be preserved from input to output")
+        parser.print_help()
         return
     
-    input_dir = sys.argv[1]
-    output_dir = sys.argv[2] if len(sys.argv) > 2 else "./parsed_tables"
+    args = parser.parse_args()
+    input_dir = args.input_directory
+    output_dir = args.output_directory
+    jobs = args.jobs if args.jobs > 0 else (os.cpu_count() or 1)
+    stream_threshold = None
+    if args.max_memory:
+        stream_threshold = args.max_memory * 1024 * 1024 // MEMORY_PER_INPUT_BYTE
+    
+    if args.format in ('parquet', 'arrow') and export.pa is None:
+        print(f"--format {args.format} needs pyarrow (pip install pyarrow), or use --format native")
+        return
     
     # Find all .tab.bytes files
     print(f"Searching for .tab.bytes files in: {input_dir}")
@@ -181,9 +359,13 @@ def main():
     
     if not tab_files:
         print("No .tab.bytes files found!")
+        if args.watch:
+            watch_and_convert(args, input_dir, output_dir, jobs, stream_threshold)
         return
     
     print(f"Found {len(tab_files)} .tab.bytes files")
+    if jobs > 1:
+        print(f"Using {jobs} worker processes")
     print(f"Output will preserve directory structure to: {os.path.abspath(output_dir)}\n")
     print("=" * 80)
     
@@ -202,13 +384,36 @@ def main():
     passed_count = 0
     failed_count = 0
     
-    for i, filepath in enumerate(tab_files, 1):
+    # Skip inputs that are unchanged since the last run
+    manifest = {} if args.force else load_manifest(output_dir)
+    new_manifest = {}
+    states = []
+    fingerprints = []
+    for filepath in tab_files:
+        relative_path = os.path.relpath(filepath, input_dir)
+        state, fingerprint = check_manifest(manifest.get(relative_path), filepath, args.format)
+        states.append(state)
+        fingerprints.append(fingerprint)
+    
+    to_parse = [fp for fp, state in zip(tab_files, states) if state != 'unchanged']
+    parsed = process_files(to_parse, input_dir, output_dir, jobs, args.format, args.profile, stream_threshold)
+    profiles = []
+    
+    for i, filepath in enumerate(tab_files):
         filename = os.path.basename(filepath)
         relative_path = os.path.relpath(filepath, input_dir)
         
-        print(f"[{i}/{len(tab_files)}] {relative_path}...", end=" ", flush=True)
+        print(f"[{i + 1}/{len(tab_files)}] {relative_path}...", end=" ", flush=True)
+        
+        if states[i] == 'unchanged':
+            entry = manifest[relative_path]['entry']
+            new_manifest[relative_path] = dict(fingerprints[i], entry=entry)
+            results['passed'].append(entry)
+            passed_count += 1
+            print(f"= unchanged ({entry['rows']} rows)")
+            continue
         
-        result = parse_single_file(filepath, input_dir, output_dir, verbose=False)
+        _, _, result = next(parsed)
         
         # Build result entry
         entry = {
@@ -222,11 +427,21 @@ def main():
             'output_size': result['output_size']
         }
         
+        if result.get('streamed'):
+            entry['streamed'] = True
+        
+        if result.get('profile'):
+            entry['profile'] = result['profile']
+            profiles.append((relative_path, result['profile']))
+        
         if result['success']:
             entry['output_path'] = result['output_path']
             results['passed'].append(entry)
+            # Profiles describe one run, don't carry them over to skipped files
+            manifest_entry = {key: value for key, value in entry.items() if key != 'profile'}
+            new_manifest[relative_path] = dict(fingerprints[i], entry=manifest_entry)
             passed_count += 1
-            print(f"✓ ({result['rows']} rows)")
+            print(f"✓ ({result['rows']} rows{', streamed' if result.get('streamed') else ''})")
         else:
             entry['error'] = result.get('error', 'Unknown error')
             results['failed'].append(entry)
@@ -237,6 +452,30 @@ def main():
     results['metadata']['passed_count'] = passed_count
     results['metadata']['failed_count'] = failed_count
     results['metadata']['success_rate'] = f"{passed_count/len(tab_files)*100:.1f}%"
+    results['metadata']['skipped_count'] = states.count('unchanged')
+    results['metadata']['changed_count'] = states.count('changed')
+    results['metadata']['new_count'] = states.count('new')
+    
+    save_manifest(output_dir, new_manifest)
+    
+    # Parse profile over the files parsed in this run
+    if args.profile:
+        results['profile'] = {
+            'totals': merge_profiles(profile for _, profile in profiles),
+            'slowest': slowest_tables(profiles),
+        }
+    
+    # Reverse Id index over every table that parsed
+    if args.id_index:
+        index_path = os.path.join(output_dir, INDEX_NAME)
+        passed_files = [os.path.join(input_dir, entry['relative_path']) for entry in results['passed']]
+        index_tables, index_entries, index_skipped = build_id_index(passed_files, input_dir, index_path)
+        results['metadata']['id_index'] = {
+            'path': os.path.abspath(index_path),
+            'tables': index_tables,
+            'entries': index_entries,
+            'skipped': [{'relative_path': path, 'error': error} for path, error in index_skipped],
+        }
     
     # Write results to JSON
     json_output = os.path.join(output_dir, 'parse_results.json')
@@ -249,6 +488,17 @@ def main():
     print(f"  Total files: {len(tab_files)}")
     print(f"  Passed: {passed_count} ({passed_count/len(tab_files)*100:.1f}%)")
     print(f"  Failed: {failed_count} ({failed_count/len(tab_files)*100:.1f}%)")
+    print(f"  Skipped (unchanged): {states.count('unchanged')}, "
+          f"changed: {states.count('changed')}, new: {states.count('new')}")
+    
+    if args.profile:
+        totals = results['profile']['totals']
+        print(f"\nPROFILE ({totals['tables']} tables parsed, {totals['total_seconds']:.2f}s):")
+        for name, phase in sorted(totals['phases'].items(), key=lambda item: -item[1]['seconds']):
+            print(f"  {name:<10} {phase['seconds']:8.3f}s  {phase['bytes']:>14,} bytes  {phase['rows']:>10,} rows")
+        print("\nSLOWEST TABLES:")
+        for item in results['profile']['slowest']:
+            print(f"  {item['total_seconds']:8.3f}s  {item['table']} ({item['rows']:,} rows, mostly {item['slowest_phase']})")
     
     # Print failed files if any
     if failed_count > 0:
@@ -260,6 +510,100 @@ def main():
     print("\nResults saved to:")
     print(f"  TSV files: {os.path.abspath(output_dir)}")
     print(f"  JSON report: {json_output}")
+    if args.id_index:
+        print(f"  Id index: {index_path} ({index_entries:,} Ids from {index_tables} tables)")
+        for path, error in index_skipped:
+            print(f"    not indexed: {path}: {error}")
+    
+    if args.watch:
+        watch_and_convert(args, input_dir, output_dir, jobs, stream_threshold)
+
+def update_results(output_dir, input_dir, entries, failed):
+    """Replace the parse_results.json entries of re-parsed files"""
+    json_output = os.path.join(output_dir, 'parse_results.json')
+    try:
+        with open(json_output, 'r', encoding='utf-8') as f:
+            results = json.load(f)
+    except (OSError, ValueError):
+        results = {'metadata': {'input_directory': os.path.abspath(input_dir),
+                                'output_directory': os.path.abspath(output_dir)},
+                   'passed': [], 'failed': []}
+    
+    updated = {entry['relative_path'] for entry in entries + failed}
+    results['passed'] = [e for e in results['passed'] if e['relative_path'] not in updated] + entries
+    results['failed'] = [e for e in results['failed'] if e['relative_path'] not in updated] + failed
+    
+    total = len(results['passed']) + len(results['failed'])
+    results['metadata']['timestamp'] = datetime.now().isoformat()
+    results['metadata']['total_files'] = total
+    results['metadata']['passed_count'] = len(results['passed'])
+    results['metadata']['failed_count'] = len(results['failed'])
+    results['metadata']['success_rate'] = f"{len(results['passed'])/total*100:.1f}%" if total else "0.0%"
+    
+    with open(json_output, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2, ensure_ascii=False)
+
+def watch_and_convert(args, input_dir, output_dir, jobs, stream_threshold):
+    """Convert new or modified .tab.bytes files under input_dir as they appear"""
+    watcher = TreeWatcher(input_dir, ('.tab.bytes',), debounce=args.debounce)
+    print(f"\nWatching {os.path.abspath(input_dir)} for new or modified .tab.bytes files "
+          f"({watcher.mode}, Ctrl+C to stop)")
+    
+    try:
+        for changed in watcher.batches():
+            manifest = load_manifest(output_dir)
+            to_parse = []
+            fingerprints = {}
+            for filepath in changed:
+                relative_path = os.path.relpath(filepath, input_dir)
+                state, fingerprint = check_manifest(manifest.get(relative_path), filepath, args.format)
+                if state != 'unchanged':
+                    to_parse.append(filepath)
+                    fingerprints[filepath] = fingerprint
+            
+            if not to_parse:
+                continue
+            
+            print(f"\n[{datetime.now():%H:%M:%S}] {len(to_parse)} changed file(s)")
+            passed = []
+            failed = []
+            parsed = process_files(to_parse, input_dir, output_dir, jobs, args.format, False, stream_threshold)
+            for _, filepath, result in parsed:
+                relative_path = os.path.relpath(filepath, input_dir)
+                entry = {
+                    'filename': os.path.basename(filepath),
+                    'relative_path': result['relative_path'],
+                    'input_path': filepath,
+                    'status': result['status'],
+                    'rows': result['rows'],
+                    'columns': result['columns'],
+                    'input_size': result['input_size'],
+                    'output_size': result['output_size']
+                }
+                if result['success']:
+                    entry['output_path'] = result['output_path']
+                    passed.append(entry)
+                    manifest[relative_path] = dict(fingerprints[filepath], entry=entry)
+                    print(f"  {relative_path} ✓ ({result['rows']} rows)")
+                else:
+                    entry['error'] = result.get('error', 'Unknown error')
+                    failed.append(entry)
+                    manifest.pop(relative_path, None)
+                    print(f"  {relative_path} ✗ {result['status']}")
+            
+            save_manifest(output_dir, manifest)
+            update_results(output_dir, input_dir, passed, failed)
+            
+            if args.id_index:
+                index_files = [os.path.join(input_dir, path) for path in manifest]
+                _, _, index_skipped = build_id_index([f for f in index_files if os.path.exists(f)], input_dir,
+                                                     os.path.join(output_dir, INDEX_NAME))
+                for path, error in index_skipped:
+                    print(f"  {path} not in {INDEX_NAME}: {error}")
+    except KeyboardInterrupt:
+        print("\nStopped watching")
+    finally:
+        watcher.close()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,137 @@
+import os
+import time
+import random
+import argparse
+import tempfile
+from reader import Reader, decode_uleb128_array, _decode_uleb128_python
+from binary_table import BinaryTable
+from synth import SAMPLE_TABLES, write_sample_tables
+from writer import Writer
+
+def make_varint_buffer(count, seed=0):
+    """Build a buffer of varints with a mix of sizes similar to real tables"""
+    rnd = random.Random(seed)
+    choices = [0, 1, 7, 100, 300, 20000, 1_000_001, 4_294_967_291]
+    writer = Writer()
+    for _ in range(count):
+        writer.write_uleb128(rnd.choice(choices))
+    return bytes(writer.buf)
+
+def read_one_by_one(data):
+    """Old read_all_uleb128 behaviour: one read_uleb128 call per varint"""
+    reader = Reader()
+    reader.load_bytes(data)
+    vals = []
+    while reader.index < reader.len:
+        vals.append(reader.read_uleb128())
+    return vals
+
+def timed(func, *args, repeat=3):
+    """Return the best wall-clock time of func(*args) over repeat runs"""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*args)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+def bench_uleb128(name, data):
+    """Compare per-varint decoding against the bulk decoders"""
+    base = timed(read_one_by_one, data)
+    python_bulk = timed(_decode_uleb128_python, data)
+    bulk = timed(decode_uleb128_array, data)
+
+    print(f"{name} ({len(data):,} bytes)")
+    print(f"  read_uleb128 loop:  {base * 1000:8.1f} ms")
+    print(f"  bulk (pure Python): {python_bulk * 1000:8.1f} ms  x{base / python_bulk:.1f}")
+    print(f"  bulk (default):     {bulk * 1000:8.1f} ms  x{base / bulk:.1f}")
+
+def content_of(path):
+    """Return the content trunk of a .tab.bytes file"""
+    table = BinaryTable(path)
+    with open(path, 'rb') as f:
+        table.data = f.read()
+    table._parse_header()
+    start = table.get_content_trunk_position()
+    return table.data[start:start + table.content_trunk_len]
+
+def load_table(path, columnar=False, use_mmap=False, fix_mode='dict'):
+    table = BinaryTable(path, columnar=columnar, use_mmap=use_mmap, fix_mode=fix_mode)
+    table.load()
+    table.close()
+    return table
+
+def stream_table(path):
+    table = BinaryTable(path)
+    for _ in table.iter_rows():
+        pass
+    table.close()
+
+# Load modes compared per table: label -> function(path)
+LOAD_MODES = {
+    'load': load_table,
+    'columnar': lambda path: load_table(path, columnar=True),
+    'mmap': lambda path: load_table(path, use_mmap=True),
+    'iter_rows': stream_table,
+    'fix_tuple': lambda path: load_table(path, fix_mode='tuple'),
+    'fix_packed': lambda path: load_table(path, fix_mode='packed'),
+}
+
+def parse_path_of(path):
+    """Name the parse path BinaryTable takes for a file"""
+    table = BinaryTable(path)
+    table.load_header()
+    table.close()
+    return 'reader' if table._needs_reader() else 'varints'
+
+def bench_table(name, path, modes, repeat=3):
+    """Report rows/s and MB/s of each load mode for one table"""
+    size = os.path.getsize(path)
+    table = load_table(path)
+    rows = len(table.rows)
+    pooled = " +pool" if table._get_pool_columns() else ""
+
+    print(f"{name} ({rows:,} rows, {size:,} bytes, {parse_path_of(path)}{pooled})")
+    for mode in modes:
+        elapsed = timed(LOAD_MODES[mode], path, repeat=repeat)
+        print(f"  {mode:<10} {elapsed * 1000:8.1f} ms  {rows / elapsed:12,.0f} rows/s  {size / elapsed / 1e6:7.1f} MB/s")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the PGR table parser")
+    parser.add_argument('files', nargs='*', help=".tab.bytes files to benchmark as well")
+    parser.add_argument('--varints', type=int, default=1_000_000,
+                        help="Varints in the synthetic LEB128 buffer (0 to skip)")
+    parser.add_argument('--rows', type=int, default=20000,
+                        help="Rows per synthetic table (0 to skip)")
+    parser.add_argument('--tables', nargs='+', choices=list(SAMPLE_TABLES), default=list(SAMPLE_TABLES),
+                        help="Synthetic tables to benchmark")
+    parser.add_argument('--modes', nargs='+', choices=list(LOAD_MODES), default=['load', 'columnar', 'mmap', 'iter_rows'],
+                        help="Load modes to compare")
+    parser.add_argument('--repeat', type=int, default=3, help="Runs per measurement (best is reported)")
+    args = parser.parse_args()
+
+    try:
+        import numpy  # noqa: F401
+        print("NumPy: available\n")
+    except ImportError:
+        print("NumPy: not installed, default decoder is pure Python\n")
+
+    if args.varints:
+        bench_uleb128(f"synthetic {args.varints:,} varints", make_varint_buffer(args.varints))
+        for path in args.files:
+            bench_uleb128(os.path.basename(path), content_of(path))
+        print()
+
+    if args.rows:
+        with tempfile.TemporaryDirectory() as tmp:
+            write_sample_tables(tmp, args.rows)
+            for name in args.tables:
+                path = os.path.join(tmp, f"{name}.tab.bytes")
+                bench_table(f"synthetic {name}", path, args.modes, args.repeat)
+
+    for path in args.files:
+        bench_table(os.path.basename(path), path, args.modes, args.repeat)
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,132 @@
 import os
-from reader import Reader
+import mmap
+from contextlib import nullcontext
+from itertools import chain, islice
+from reader import Reader, FIX_MODES, count_uleb128, iter_uleb128_chunks
+from parse_profile import ParseProfile
+from columnar import ColumnarRows, column_kind, decode_value, encode_expression
+
+# Flag columns whose zero value is written as an empty cell
+BLANK_ZERO_COLUMNS = ("IsHiddenMode", "ShowTips", "IsHidden")
+
+# Column types that read strings and therefore depend on the string pool flag
+STRING_COLUMN_TYPES = (2, 4, 9, 11, 12)
+
+# Columnar row start (varint index past the metadata) keyed by (columns,
+# parse path). A repeat schema skips the metadata scan once a cheap check at
+# the cached index confirms it in the new file (BinaryTable._confirm_row_start)
+_layout_cache = {}
+
+# Compiled row decoders keyed by schema signature (columns, string pool columns, layout)
+_row_decoder_cache = {}
+
+def compile_row_decoder(columns, pool_columns=frozenset(), columnar=False, fix_mode='dict'):
+    """
+    Build a row decoder specialized for one column schema.
+    
+    Returns a factory taking a Reader and returning a function that decodes
+    one row dict from the reader's current position. The generated code
+    calls the per-type read methods directly instead of dispatching through
+    Reader.read and set_read_column for every cell. Factories are cached
+    by schema so tables with identical headers share them.
+    
+    With columnar=True the decoder returns a tuple of values already
+    encoded for ColumnarRows storage (string pool columns as pool indexes).
+    fix_mode selects the fix vector readers (see reader.FIX_MODES).
+    """
+    key = (tuple(columns), frozenset(pool_columns), columnar, fix_mode)
+    factory = _row_decoder_cache.get(key)
+    if factory is not None:
+        return factory
+    
+    method_names = {t: m.__name__ for t, m in Reader(fix_mode).read_by_type.items()}
+    
+    bind_lines = []
+    body_lines = []
+    items = []
+    using_pool = None
+    
+    for col_idx, (ctype, cname) in enumerate(columns):
+        pooled = (col_idx + 1) in pool_columns
+        kind = column_kind(ctype, pooled) if columnar else 'object'
+        
+        if kind == 'pool':
+            # Keep the pool index, the string is resolved when viewed
+            ctype = 14
+        elif ctype in STRING_COLUMN_TYPES and pooled != using_pool:
+            body_lines.append(f"reader.m_is_using_string_pool = {pooled}")
+            using_pool = pooled
+        
+        if ctype in method_names:
+            name = method_names[ctype]
+            line = f"    {name} = reader.{name}"
+            if line not in bind_lines:
+                bind_lines.append(line)
+            body_lines.append(f"v{col_idx} = {name}()")
+        else:
+            # Unknown type, let Reader.read raise like the generic path
+            body_lines.append(f"v{col_idx} = reader.read({ctype!r})")
+        
+        value = f"v{col_idx}"
+        if kind == 'object' and cname in BLANK_ZERO_COLUMNS:
+            value = f"'' if {value} == 0 else {value}"
+        elif kind != 'object':
+            value = encode_expression(kind, value)
+        
+        if columnar:
+            items.append(f"{value},")
+        else:
+            items.append(f"{cname!r}: {value}")
+    
+    if columnar:
+        body_lines.append("return (" + " ".join(items) + ")")
+    else:
+        body_lines.append("return {" + ", ".join(items) + "}")
+    
+    source = "\n".join(
+        ["def bind(reader):"]
+        + bind_lines
+        + ["    def decode_row():"]
+        + [f"        {line}" for line in body_lines]
+        + ["    return decode_row"]
+    )
+    
+    namespace = {}
+    exec(compile(source, f"<row decoder {len(columns)} cols>", "exec"), namespace)
+    factory = namespace["bind"]
+    _row_decoder_cache[key] = factory
+    return factory
 
 class BinaryTable:
     """Parser for .tab.bytes binary table files"""
     
-    def __init__(self, filepath):
+    def __init__(self, filepath, columnar=False, use_mmap=False, fix_mode='dict', profile=False,
+                 low_memory=False):
         self.filepath = filepath
         self.data = None
         
+        # Map the file instead of reading it; readers work on offset windows
+        self.use_mmap = use_mmap
+        self._mmap = None
+        
+        # Set when the file turns out to be a plain TSV (like Sha1.tab.bytes)
+        self.is_tsv = False
+        
+        # Store rows as ColumnarRows (typed arrays per column) instead of dicts
+        self.columnar = columnar
+        
+        # Form of fix2/fix3/quaternion values: 'dict', 'tuple' or 'packed' (see reader.FIX_MODES)
+        if fix_mode not in FIX_MODES:
+            raise ValueError(f"Unknown fix mode: {fix_mode}")
+        self.fix_mode = fix_mode
+        
+        # iter_rows decodes plain varint tables chunk by chunk instead of
+        # decoding the whole content first (use with use_mmap for huge files)
+        self.low_memory = low_memory
+        
+        # Per-phase timings and counters (ParseProfile), only when profiling
+        self.profile = ParseProfile() if profile else None
+        
         # Header fields
         self.header_len = 0
         self.col_count = 0
@@ -27,28 +146,86 @@ class BinaryTable:
         self.m_pool_offset_info_array = []
         self.m_pool_content_start_pos = 0
         
+        # Decoded pool strings by index, shared by every read of this table
+        self.m_pool_string_cache = {}
+        self.pool_cache_hits = 0
+        self.pool_cache_misses = 0
+        
+        # Set once load() has decoded the content into self.rows
+        self.rows_loaded = False
+        
+        # Primary key -> row offset in the content trunk (built by get_by_pk)
+        self._pk_index = None
+        
         self.rows = []
         
     def load(self):
         """Load and parse the binary table file"""
-        with open(self.filepath, 'rb') as f:
-            self.data = f.read()
+        if self._load_data():
+            self._parse_content()
+            if self.profile is not None:
+                self.profile.add('decode', 0.0, rows=len(self.rows))
+        
+        self.rows_loaded = True
+        return self
+    
+    def load_header(self):
+        """Load the file and parse the header and string pool info, without decoding rows"""
+        if self._load_data():
+            with self._phase('pool_info', self._pool_trunk_size()):
+                self._read_pool_info_trunk()
+        
+        return self
+    
+    def _phase(self, name, nbytes=0):
+        """Time a parse phase when profiling is enabled"""
+        if self.profile is None:
+            return nullcontext()
+        return self.profile.phase(name, nbytes)
+    
+    def get_profile(self):
+        """Get the parse profile as a dict (None unless created with profile=True)"""
+        if self.profile is None:
+            return None
+        return self.profile.to_dict(self.get_pool_cache_stats())
+    
+    def _load_data(self):
+        """Read (or map) the file and parse its header; returns False for TSV files"""
+        if self.data is not None:
+            # Header already parsed by load_header(), get_by_pk() or iter_rows()
+            return not self.is_tsv
+        
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+        
+        with self._phase('read', os.path.getsize(self.filepath)), open(self.filepath, 'rb') as f:
+            if self.use_mmap and os.fstat(f.fileno()).st_size > 0:
+                self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                self.data = self._mmap
+            else:
+                self.data = f.read()
         
         # Check for special case: file is already a TSV
-        if self.data.startswith(b'Name\t') or self.data.startswith(b'Name\x09'):
+        if self.data[:5] == b'Name\t':
             # This is already a TSV file (like Sha1.tab.bytes)
             # Parse it as TSV to populate rows
-            self._parse_existing_tsv()
-            return self
+            self.is_tsv = True
+            with self._phase('tsv', len(self.data)):
+                self._parse_existing_tsv()
+            if self.profile is not None:
+                self.profile.add('tsv', 0.0, rows=len(self.rows))
+            return False
         
         # Check for empty/zeroed files
         if len(self.data) > 100 and self.data[:100] == b'\x00' * 100:
             raise ValueError("File is empty or corrupted (all zeros)")
         
-        self._parse_header()
-        self._parse_content()
-        
-        return self
+        with self._phase('header'):
+            self._parse_header()
+        if self.profile is not None:
+            self.profile.add('header', 0.0, 4 + self.header_len)
+        return True
 
     def _parse_existing_tsv(self):
         """Parse a file that's already in TSV format"""
@@ -56,7 +233,7 @@ class BinaryTable:
         from io import StringIO
         
         # Decode as text
-        text = self.data.decode('utf-8', errors='ignore')
+        text = self.data[:].decode('utf-8', errors='ignore')
         
         # Parse TSV
         reader = csv.reader(StringIO(text), delimiter='\t')
@@ -93,6 +270,15 @@ class BinaryTable:
         reader = Reader()
         reader.load_bytes(self.data)
         
+        # Start from a clean header state if the file is parsed again
+        self.columns = []
+        self.has_pk = False
+        self.pk_idx = 0
+        self.primary_key = None
+        self.primary_key_len = 0
+        self.magic = 0
+        self._pk_index = None
+        
         # Read header length (this is the ONLY fixed u32!)
         self.header_len = reader.read_u32_le()
         
@@ -111,6 +297,7 @@ class BinaryTable:
         if self.has_pk:
             primary_key_index = reader.read_int() or 0
             if primary_key_index < len(self.columns):
+                self.pk_idx = primary_key_index
                 self.primary_key = self.columns[primary_key_index][1]
             self.primary_key_len = reader.read_int() or 0
         
@@ -161,23 +348,41 @@ class BinaryTable:
                 return True
         return False
     
-    def _parse_content(self):
-        """Parse the content section"""
-        # Get content section
+    def _get_content_bounds(self, warn=True):
+        """Get (start, end) of the content trunk, clamped to the file size"""
         content_start = self.get_content_trunk_position()
         content_end = content_start + self.content_trunk_len
         
         #print(f"[DEBUG] Content: bytes {content_start} to {content_end}")
         
         if content_end > len(self.data):
-            print(f"[WARN] Content end ({content_end}) exceeds file size ({len(self.data)})")
+            if warn:
+                print(f"[WARN] Content end ({content_end}) exceeds file size ({len(self.data)})")
             content_end = len(self.data)
         
-        content = self.data[content_start:content_end]
+        return content_start, content_end
+    
+    def _parse_content(self):
+        """Parse the content section"""
+        # Get content section
+        content_start, content_end = self._get_content_bounds()
         
         # Initialize string pool BEFORE parsing content
-        self._read_pool_info_trunk()
-        
+        with self._phase('pool_info', self._pool_trunk_size()):
+            self._read_pool_info_trunk()
+        
+        with self._phase('decode', content_end - content_start):
+            if self._needs_reader():
+                # Must use Reader for type-aware parsing
+                #print("[DEBUG] Using Reader-based parsing")
+                self._parse_with_reader(content_start, content_end)
+            else:
+                # Can use fast varint array method
+                #print("[DEBUG] Using varint array parsing")
+                self._parse_with_varints(content_start, content_end)
+    
+    def _needs_reader(self):
+        """Check if the content needs type-aware Reader parsing (vs plain varints)"""
         # Check if table has complex types OR uses string pool
         has_complex_types = self._has_complex_types()
         has_string_pool = self.m_pool_column_size > 0
@@ -185,14 +390,11 @@ class BinaryTable:
         
         #print(f"[DEBUG] has_complex_types={has_complex_types}, has_string_pool={has_string_pool}")
         
-        if has_complex_types or has_string_pool or has_strings:
-            # Must use Reader for type-aware parsing
-            #print("[DEBUG] Using Reader-based parsing")
-            self._parse_with_reader(content)
-        else:
-            # Can use fast varint array method
-            #print("[DEBUG] Using varint array parsing")
-            self._parse_with_varints(content)
+        return has_complex_types or has_string_pool or has_strings
+    
+    def _pool_trunk_size(self):
+        """Size of the string pool trunk (what follows the content trunk)"""
+        return max(0, len(self.data) - self.get_pool_offset_trunk_start_position())
     
     def _read_pool_info_trunk(self):
         """Initialize string pool data structure"""
@@ -268,6 +470,7 @@ class BinaryTable:
             
             # Read offset array
             self.m_pool_offset_info_array = []
+            self.m_pool_string_cache = {}
             reader.index = offset_array_start
             
             for i in range(m_string_pool_size):
@@ -295,17 +498,35 @@ class BinaryTable:
                 return True
         return False
     
-    def _parse_with_reader(self, content):
+    def _content_reader(self, content_start, content_end):
+        """Create a Reader bounded to the content trunk of self.data (no copy)"""
+        reader = Reader(self.fix_mode)
+        reader.load_bytes(self.data, content_end, content_start)
+        return reader
+    
+    def _parse_with_reader(self, content_start, content_end):
         """Parse content using Reader (for tables with complex types)"""
-        reader = Reader()
-        reader.load_bytes(content)
+        if self.columnar:
+            rows = self._new_columnar_rows(self._get_pool_columns())
+        else:
+            rows = []
+        
+        for r in self._iter_reader_rows(content_start, content_end, self.columnar):
+            rows.append(r)
+        
+        self.rows = rows
+    
+    def _iter_reader_rows(self, content_start, content_end, columnar=False, with_offsets=False):
+        """
+        Decode rows one at a time using Reader (dicts, or storage tuples if
+        columnar); with_offsets yields (offset in the content trunk, row)
+        """
+        reader = self._content_reader(content_start, content_end)
         reader.set_binary_file_folder(self)
         
         col_types = [t for t, _ in self.columns]
         col_names = [n for _, n in self.columns]
         
-        rows = []
-        
         # Use explicit row count if available
         if self.row_count and self.row_count > 0 and self.row_count < 1_000_000:
             max_rows = self.row_count
@@ -314,110 +535,140 @@ class BinaryTable:
             max_rows = 100000
             #print(f"[DEBUG] No valid row count in header, using max: {max_rows}")
         
-        consecutive_failures = 0
-        
         # Detect columnar format
-        is_columnar = self._detect_columnar_in_reader(reader, col_types)
-        
-        if is_columnar:
-            #print("[DEBUG] Detected columnar format, skipping metadata")
-            reader = self._skip_columnar_metadata(content, col_types)
-        
-        while reader.index < reader.len and len(rows) < max_rows:
-            r = {}
-            row_valid = True
+        with self._phase('layout'):
+            is_columnar = self._detect_columnar_in_reader(reader, col_types)
             
-            for col_idx, (ctype, cname) in enumerate(zip(col_types, col_names)):
-                try:
-                    reader.set_read_column(col_idx + 1)
-                    value = reader.read(ctype)
-                    
-                    if cname in ("IsHiddenMode", "ShowTips", "IsHidden") and value == 0:
-                        r[cname] = ""
-                    else:
-                        r[cname] = value
-                        
-                except Exception:
-                    if len(rows) < 3:  # Show errors for first few rows
-                        pass
-                        #print(f"[DEBUG] Row {len(rows)} col {cname}: {e}")
-                    row_valid = False
-                    consecutive_failures += 1
-                    break
-            
-            if not row_valid or consecutive_failures >= 3:
-                #print(f"[DEBUG] Stopping at row {len(rows)} (consecutive failures: {consecutive_failures})")
+            if is_columnar:
+                #print("[DEBUG] Detected columnar format, skipping metadata")
+                reader = self._skip_columnar_metadata(content_start, content_end, col_types)
+        
+        pool_columns = self._get_pool_columns()
+        decode_row = compile_row_decoder(self.columns, pool_columns, columnar, self.fix_mode)(reader)
+        check_id = self.has_pk and 'Id' in col_names
+        
+        if columnar and check_id:
+            id_idx = len(col_names) - 1 - col_names[::-1].index('Id')
+            id_kind = column_kind(col_types[id_idx], (id_idx + 1) in pool_columns)
+        
+        count = 0
+        while reader.index < reader.len and count < max_rows:
+            row_offset = reader.index - content_start
+            try:
+                r = decode_row()
+            except Exception:
+                #print(f"[DEBUG] Stopping at row {count} (decode error)")
                 break
             
-            if self.has_pk and 'Id' in col_names:
-                if r.get('Id') is None and len(rows) >= 4:
-                    #print(f"[DEBUG] Stopping at row {len(rows)} (None ID)")
+            if check_id and count >= 4:
+                if columnar:
+                    row_id = decode_value(id_kind, r[id_idx], self)
+                else:
+                    row_id = r.get('Id')
+                if row_id is None:
+                    #print(f"[DEBUG] Stopping at row {count} (None ID)")
                     break
             
-            rows.append(r)
-            consecutive_failures = 0
-        
-        self.rows = rows
+            yield (row_offset, r) if with_offsets else r
+            count += 1
+    
+    def _new_columnar_rows(self, pool_columns=frozenset(), kind=None):
+        """Create empty columnar storage for this table's columns"""
+        kinds = [
+            kind or column_kind(ctype, (col_idx + 1) in pool_columns)
+            for col_idx, (ctype, _) in enumerate(self.columns)
+        ]
+        return ColumnarRows(self.columns, kinds, self)
+    
+    def _layout_key(self, parse_path):
+        """Layout cache key of this table's schema on one parse path"""
+        return (tuple(self.columns), parse_path)
+    
+    def _confirm_row_start(self, vals, start, is_start):
+        """
+        Check a cached row start against this file's leading values: the
+        scan would get that far and stop there, i.e. is_start(start) holds
+        and doesn't hold one row earlier. Far cheaper than the scan itself.
+        """
+        if start >= 10000 or start + self.col_count >= len(vals):
+            return False
+        return is_start(start) and not (start and is_start(start - self.col_count))
     
     def _detect_columnar_in_reader(self, reader, col_types):
         """Check if data starts with columnar format"""
         start_pos = reader.index
-        
-        sample = []
-        try:
-            for _ in range(min(self.col_count, 10)):
-                val = reader.read_uleb128()
-                sample.append(val)
-        except:  # noqa: E722
-            pass
-        
+        sample_size = min(self.col_count, 10)
+        sample, _ = reader.read_uleb128_with_offsets(sample_size)
         reader.index = start_pos
         
+        return self._is_columnar_sample(sample + [None] * (sample_size - len(sample)))
+    
+    def _is_columnar_sample(self, sample):
+        """Check the leading varints of the content for columnar metadata"""
         if len(sample) >= self.col_count:
             large_count = sum(1 for v in sample[:self.col_count] if v and v >= 10_000_000)
             return large_count >= self.col_count - 1
         
         return False
     
-    def _skip_columnar_metadata(self, content, col_types):
+    def _skip_columnar_metadata(self, content_start, content_end, col_types):
         """Skip columnar metadata and return reader at row data start"""
-        temp_reader = Reader()
-        temp_reader.load_bytes(content)
-        vals = temp_reader.read_all_uleb128()
-        
-        col_names = [n for _, n in self.columns]
-        has_id = 'Id' in col_names
+        has_id = 'Id' in [n for _, n in self.columns]
+        key = self._layout_key('reader')
+        cached = _layout_cache.get(key)
+        
+        def reader_at(position):
+            new_reader = self._content_reader(position, content_end)
+            new_reader.set_binary_file_folder(self)
+            return new_reader
+        
+        # A repeat schema only decodes up to its cached row start to confirm it
+        if cached is not None:
+            temp_reader = self._content_reader(content_start, content_end)
+            vals, offsets = temp_reader.read_uleb128_with_offsets(cached + self.col_count + 1)
+            if self._confirm_row_start(vals, cached, lambda start: self._is_reader_row_start(vals, start, has_id)):
+                return reader_at(offsets[cached])
+        
+        # The scan below never looks past 10000 + col_count varints, so only
+        # decode that prefix and remember where each varint starts
+        temp_reader = self._content_reader(content_start, content_end)
+        vals, offsets = temp_reader.read_uleb128_with_offsets(10000 + self.col_count)
         
         for start in range(0, min(10000, len(vals) - self.col_count), self.col_count):
-            row = vals[start:start + self.col_count]
-            
-            if has_id and row[0] is not None:
-                id_val = row[0]
-                if 1_000_000 <= id_val <= 4_000_000_000:
-                    if len(row) > 1 and row[1] is not None and row[1] < 10_000_000:
-                        new_reader = Reader()
-                        new_reader.load_bytes(content)
-                        new_reader.set_binary_file_folder(self)
-                        
-                        for _ in range(start):
-                            new_reader.read_uleb128()
-                        
-                        return new_reader
+            if self._is_reader_row_start(vals, start, has_id):
+                _layout_cache[key] = start
+                return reader_at(offsets[start])
         
-        reader = Reader()
-        reader.load_bytes(content)
-        reader.set_binary_file_folder(self)
-        return reader
+        return reader_at(content_start)
+    
+    def _is_reader_row_start(self, vals, start, has_id):
+        """Whether the row at vals[start] looks like the first data row (Id, then a small value)"""
+        row = vals[start:start + self.col_count]
+        if not has_id or row[0] is None or not 1_000_000 <= row[0] <= 4_000_000_000:
+            return False
+        return len(row) > 1 and row[1] is not None and row[1] < 10_000_000
     
-    def _parse_with_varints(self, content):
+    def _parse_with_varints(self, content_start, content_end):
         """Parse content using varint array (for simple types only)"""
-        reader = Reader()
-        reader.load_bytes(content)
+        col_names = [name for _, name in self.columns]
+        vals, row_count = self._locate_simple_rows(content_start, content_end)
+        self.rows = self._parse_simple_rows(vals, row_count, col_names)
+        
+        #print(f"[DEBUG] Actually parsed {len(self.rows)} rows")
+    
+    def _locate_simple_rows(self, content_start, content_end):
+        """Decode the content varints and return (row values, row count)"""
+        reader = self._content_reader(content_start, content_end)
         vals = reader.read_all_uleb128()
         
         #print(f"[DEBUG] Decoded {len(vals)} varints from content")
         #print(f"[DEBUG] Expected ~{self.row_count * self.col_count} varints for {self.row_count} rows × {self.col_count} cols")
         
+        with self._phase('layout'):
+            return self._find_simple_rows(vals)
+    
+    def _find_simple_rows(self, vals):
+        """Detect the layout of decoded content varints and return (row values, row count)"""
         col_names = [name for _, name in self.columns]
         
         if self._is_columnar_format(vals):
@@ -434,19 +685,17 @@ class BinaryTable:
                 row_count = len(row_vals) // self.col_count
             
             #print(f"[DEBUG] Will parse {row_count} rows")
-            self.rows = self._parse_simple_rows(row_vals, row_count, col_names)
+            return row_vals, row_count
+        
+        #print("[DEBUG] Detected row format")
+        # Use header row count if available
+        if self.row_count and self.row_count > 0 and self.row_count < len(vals) // self.col_count:
+            row_count = self.row_count
         else:
-            #print("[DEBUG] Detected row format")
-            # Use header row count if available
-            if self.row_count and self.row_count > 0 and self.row_count < len(vals) // self.col_count:
-                row_count = self.row_count
-            else:
-                row_count = self._find_valid_row_count(vals, col_names)
-            
-            #print(f"[DEBUG] Will parse {row_count} rows")
-            self.rows = self._parse_simple_rows(vals, row_count, col_names)
+            row_count = self._find_valid_row_count(vals, col_names)
         
-        #print(f"[DEBUG] Actually parsed {len(self.rows)} rows")
+        #print(f"[DEBUG] Will parse {row_count} rows")
+        return vals, row_count
     
     def _is_columnar_format(self, vals):
         """Check if data is in columnar format"""
@@ -459,41 +708,64 @@ class BinaryTable:
         return large_count >= self.col_count - 1
     
     def _find_row_start(self, vals, col_names):
-        """Find where row data starts in columnar format"""
+        """Find where row data starts in columnar format (cached per schema)"""
+        start = self._cached_row_start(vals, col_names)
+        if start is not None:
+            return start
+        
         has_id = 'Id' in col_names
+        start = 0
+        for candidate in range(0, min(10000, len(vals) - self.col_count), self.col_count):
+            if self._is_row_start(vals, candidate, has_id):
+                start = candidate
+                break
         
-        for start in range(0, min(10000, len(vals) - self.col_count), self.col_count):
-            row = vals[start:start + self.col_count]
-            
-            if has_id and row[0] is not None:
-                id_val = row[0]
-                if not (1_000_000 <= id_val <= 4_000_000_000):
-                    continue
-                
-                if len(row) > 1 and row[1] is not None:
-                    if row[1] >= 10_000_000:
-                        continue
+        _layout_cache[self._layout_key('varints')] = start
+        return start
+    
+    def _cached_row_start(self, vals, col_names):
+        """Row start cached for this schema if vals confirm it, else None"""
+        start = _layout_cache.get(self._layout_key('varints'))
+        has_id = 'Id' in col_names
+        if start is not None and self._confirm_row_start(vals, start,
+                                                         lambda s: self._is_row_start(vals, s, has_id)):
+            return start
+        return None
+    
+    def _is_row_start(self, vals, start, has_id):
+        """Whether 10 rows with an Id in range start at vals[start]"""
+        row = vals[start:start + self.col_count]
+        
+        if has_id and row[0] is not None:
+            id_val = row[0]
+            if not (1_000_000 <= id_val <= 4_000_000_000):
+                return False
             
-            valid_streak = 0
-            for i in range(min(10, (len(vals) - start) // self.col_count)):
-                test_row = vals[start + i * self.col_count:start + (i + 1) * self.col_count]
-                if len(test_row) != self.col_count:
-                    break
-                
-                if test_row[0] is not None and 1_000_000 <= test_row[0] <= 4_000_000_000:
-                    valid_streak += 1
-                else:
-                    break
+            if len(row) > 1 and row[1] is not None:
+                if row[1] >= 10_000_000:
+                    return False
+        
+        valid_streak = 0
+        for i in range(min(10, (len(vals) - start) // self.col_count)):
+            test_row = vals[start + i * self.col_count:start + (i + 1) * self.col_count]
+            if len(test_row) != self.col_count:
+                break
             
-            if valid_streak >= 10:
-                return start
+            if test_row[0] is not None and 1_000_000 <= test_row[0] <= 4_000_000_000:
+                valid_streak += 1
+            else:
+                break
         
-        return 0
+        return valid_streak >= 10
     
     def _find_valid_row_count(self, vals, col_names):
         """Find valid row count for pure row format"""
         max_rows = len(vals) // self.col_count
-        
+        first_values = vals[:max_rows * self.col_count:self.col_count]
+        return self._valid_row_count(first_values, max_rows, col_names)
+    
+    def _valid_row_count(self, first_values, max_rows, col_names):
+        """Find valid row count from the first value of each row (falsy for None)"""
         # If we have an explicit row count from the header and it's reasonable, use it
         if self.row_count and 0 < self.row_count <= max_rows:
             return self.row_count
@@ -504,13 +776,12 @@ class BinaryTable:
         if has_id:
             # Only stop on None if we see it after many valid rows (likely garbage data)
             for row_idx in range(max_rows):
-                start = row_idx * self.col_count
-                if vals[start] is None and row_idx >= 10:  # Allow None in first 10 rows
+                if not first_values[row_idx] and row_idx >= 10:  # Allow None in first 10 rows
                     # Check if most subsequent rows are also None (garbage data pattern)
                     none_count = 0
                     check_count = min(5, max_rows - row_idx)
                     for check_idx in range(row_idx, row_idx + check_count):
-                        if vals[check_idx * self.col_count] is None:
+                        if not first_values[check_idx]:
                             none_count += 1
                     
                     if none_count >= 3:  # Multiple None IDs in a row = garbage
@@ -520,22 +791,282 @@ class BinaryTable:
     
     def _parse_simple_rows(self, vals, row_count, col_names):
         """Parse rows from varint array (simple types only)"""
-        rows = []
+        if self.columnar:
+            return self._parse_simple_columns(vals, row_count, col_names)
+        
+        return list(self._iter_simple_rows(vals, row_count, col_names))
+    
+    def _iter_simple_rows(self, vals, row_count, col_names):
+        """Yield row dicts from a varint array (simple types only)"""
         row_iter = iter(vals)
         
         for _ in range(row_count):
             r = {}
             for cname in col_names:
                 v = next(row_iter, None)
-                if cname in ("IsHiddenMode", "ShowTips", "IsHidden") and v == 0:
+                if cname in BLANK_ZERO_COLUMNS and v == 0:
                     r[cname] = ""
                 else:
                     r[cname] = v
-            rows.append(r)
-        
+            yield r
+    
+    def _iter_content_varints(self, content_start, content_end, skip=0):
+        """Iterate content varints (None for 0) from index skip on, decoded chunk by chunk"""
+        chunks = (
+            [v or None for v in (chunk if isinstance(chunk, list) else chunk.tolist())]
+            for chunk in iter_uleb128_chunks(self.data, content_start, content_end)
+        )
+        values = chain.from_iterable(chunks)
+        return islice(values, skip, None) if skip else values
+    
+    def _iter_simple_rows_streamed(self, content_start, content_end):
+        """
+        Row dicts of a plain varint table, the same as _locate_simple_rows
+        and _iter_simple_rows give, without holding every varint: layout
+        detection only looks at a bounded prefix, so the values are counted
+        and decoded in chunks instead.
+        """
+        col_names = [name for _, name in self.columns]
+        col_count = self.col_count
+        total = count_uleb128(self.data, content_start, content_end)
+        
+        with self._phase('layout'):
+            # _find_row_start never looks past 10000 + 10 rows of values; a
+            # cached row start only needs the values up to its 10 rows
+            prefix_len = min(total, 10000 + 10 * col_count)
+            cached = _layout_cache.get(self._layout_key('varints'))
+            head_len = prefix_len if cached is None else min(prefix_len, cached + 11 * col_count)
+            prefix = list(islice(self._iter_content_varints(content_start, content_end), head_len))
+            
+            if self._is_columnar_format(prefix):
+                row_start = self._cached_row_start(prefix, col_names)
+                if row_start is None:
+                    if head_len < prefix_len:
+                        prefix = list(islice(self._iter_content_varints(content_start, content_end), prefix_len))
+                    row_start = self._find_row_start(prefix, col_names)
+                if self.row_count and self.row_count > 0:
+                    row_count = self.row_count
+                else:
+                    row_count = (total - row_start) // col_count
+            else:
+                row_start = 0
+                if self.row_count and self.row_count > 0 and self.row_count < total // col_count:
+                    row_count = self.row_count
+                else:
+                    # Needs the first value of every row, keep one flag per row
+                    max_rows = total // col_count
+                    first_values = bytearray(max_rows)
+                    for i, v in enumerate(self._iter_content_varints(content_start, content_end)):
+                        if i >= max_rows * col_count:
+                            break
+                        if v and i % col_count == 0:
+                            first_values[i // col_count] = 1
+                    row_count = self._valid_row_count(first_values, max_rows, col_names)
+        
+        yield from self._iter_simple_rows(
+            self._iter_content_varints(content_start, content_end, row_start), row_count, col_names)
+    
+    def _parse_simple_columns(self, vals, row_count, col_names):
+        """Split a varint array into ColumnarRows (simple types only)"""
+        rows = self._new_columnar_rows(kind='uint')
+        row_count = max(row_count, 0)
+        count = len(col_names)
+        used = vals[:row_count * count]
+        
+        for col_idx in range(count):
+            column = [v or 0 for v in used[col_idx::count]]
+            # Missing trailing values read as None, like next(row_iter, None)
+            column.extend([0] * (row_count - len(column)))
+            rows.set_column(col_idx, column)
+        
+        rows.count = row_count
         return rows
     
+    # Primary key lookup
+    def _read_primary_key_index(self):
+        """
+        Build the primary key -> row offset map from the index trunks.
+        
+        The primary key trunk holds one key per row (encoded like the key
+        column) and the row trunk one varint per row: the row's start
+        offset in the content trunk, or its byte length when the values
+        add up to the content trunk length. Raises ValueError when the
+        trunks don't decode to exactly that (row_count keys filling the
+        primary key trunk, ascending offsets inside the content trunk).
+        """
+        pk_start = self.get_index_trunk_position()
+        rows_start = self.get_after_primary_key_trunk_position()
+        rows_end = min(self.get_content_trunk_position(), len(self.data))
+        pk_type = self.columns[self.pk_idx][0]
+        
+        reader = Reader()
+        reader.load_bytes(self.data, min(rows_start, len(self.data)), pk_start)
+        reader.set_binary_file_folder(self)
+        reader.set_read_column(self.pk_idx + 1)
+        
+        name = os.path.basename(self.filepath)
+        keys = []
+        while reader.index < reader.len and len(keys) < self.row_count:
+            keys.append(self.normalize_pk(reader.read(pk_type)))
+        
+        if len(keys) != self.row_count or reader.index != reader.len:
+            raise ValueError(f"{name}: primary key trunk doesn't hold {self.row_count} keys "
+                             f"in {self.primary_key_len} bytes")
+        
+        reader.load_bytes(self.data, rows_end, rows_start)
+        offsets = []
+        while reader.index < reader.len and len(offsets) < len(keys):
+            offsets.append(reader.read_int() or 0)
+        
+        if len(offsets) > 1 and sum(offsets) == self.content_trunk_len:
+            # Row lengths, convert to start offsets
+            position = 0
+            for i, length in enumerate(offsets):
+                offsets[i] = position
+                position += length
+        
+        if (len(offsets) != len(keys) or reader.index != reader.len
+                or any(b < a for a, b in zip(offsets, offsets[1:]))
+                or (offsets and not 0 <= offsets[-1] < self.content_trunk_len)):
+            raise ValueError(f"{name}: row trunk doesn't hold {len(keys)} row offsets")
+        
+        pk_index = {}
+        for key, offset in zip(keys, offsets):
+            pk_index.setdefault(key, offset)
+        self._pk_index = pk_index
+    
+    def get_primary_key_offsets(self):
+        """
+        Get the primary key -> row offset (in the content trunk) map.
+        
+        Read from the index trunks on first use; works on a table opened
+        with load_header() (or not loaded yet).
+        """
+        if self.data is None:
+            self.load_header()
+        
+        if not self.has_pk or self.pk_idx >= len(self.columns):
+            raise ValueError(f"{os.path.basename(self.filepath)} has no primary key")
+        
+        if self._pk_index is None:
+            with self._phase('pk_index', self.primary_key_len + self.row_trunk_len):
+                self._read_primary_key_index()
+        return self._pk_index
+    
+    def scan_primary_key_offsets(self):
+        """
+        Get the primary key -> row offset map by decoding the rows in order,
+        for tables whose index trunks don't validate (get_primary_key_offsets
+        raises). The first row wins when a key repeats, like _scan_for_pk.
+        """
+        if self.data is None:
+            self.load_header()
+        
+        if not self.has_pk or self.pk_idx >= len(self.columns):
+            raise ValueError(f"{os.path.basename(self.filepath)} has no primary key")
+        
+        content_start, content_end = self._get_content_bounds(warn=False)
+        column = self.columns[self.pk_idx][1]
+        offsets = {}
+        
+        if self._needs_reader():
+            for offset, row in self._iter_reader_rows(content_start, content_end, with_offsets=True):
+                offsets.setdefault(self.normalize_pk(row.get(column)), offset)
+            return offsets
+        
+        # Plain varints: rows are col_count values each, from the detected row start
+        reader = self._content_reader(content_start, content_end)
+        vals, positions = reader.read_uleb128_with_offsets(count_uleb128(self.data, content_start, content_end))
+        row_vals, row_count = self._find_simple_rows(vals)
+        row_start = len(vals) - len(row_vals)
+        for row in range(row_count):
+            first = row_start + row * self.col_count
+            if first + self.pk_idx >= len(vals):
+                break
+            offsets.setdefault(self.normalize_pk(vals[first + self.pk_idx]), positions[first] - content_start)
+        return offsets
+    
+    def get_row_at(self, offset):
+        """
+        Decode the single row starting at offset in the content trunk.
+        
+        The offset comes from an index, so list counts that can't fit in
+        the content raise ValueError instead of being decoded.
+        """
+        if self.data is None:
+            self.load_header()
+        
+        content_start, content_end = self._get_content_bounds(warn=False)
+        reader = self._content_reader(content_start + offset, content_end)
+        reader.set_strict()
+        
+        if not self._needs_reader():
+            # Same raw varint values as _parse_with_varints
+            return {cname: reader.read_uleb128() for _, cname in self.columns}
+        
+        reader.set_binary_file_folder(self)
+        decode_row = compile_row_decoder(self.columns, self._get_pool_columns(), fix_mode=self.fix_mode)(reader)
+        return decode_row()
+    
+    def normalize_pk(self, value):
+        """Primary key value as read_int/read_string give it, 0/"" instead of None"""
+        if self.columns[self.pk_idx][0] == 14:
+            value = value or 0
+            # The plain varint parse returns raw unsigned values, sign them like read_int
+            if value > 0x7FFFFFFF:
+                value = -(((~value) & 0x7FFFFFFF) + 1)
+            return value
+        if self.columns[self.pk_idx][0] == 2:
+            return value or ""
+        return value
+    
+    def row_has_pk(self, row, key):
+        """Check that a decoded row dict holds primary key key"""
+        column = self.columns[self.pk_idx][1]
+        return column in row and self.normalize_pk(row[column]) == self.normalize_pk(key)
+    
+    def get_by_pk(self, key):
+        """
+        Decode the single row whose primary key equals key, or None.
+        
+        Only the header, string pool info and index trunks are parsed, so
+        this works on a table opened with load_header() (or not loaded yet)
+        without decoding every row. If the index trunks don't decode as
+        expected, or the row they point to holds another key, the rows
+        are decoded and scanned instead.
+        """
+        try:
+            offset = self.get_primary_key_offsets().get(self.normalize_pk(key))
+        except ValueError:
+            if not self.has_pk or self.pk_idx >= len(self.columns):
+                raise
+            return self._scan_for_pk(key)
+        
+        if offset is None:
+            return None
+        
+        try:
+            row = self.get_row_at(offset)
+        except Exception:
+            row = None
+        if row is not None and self.row_has_pk(row, key):
+            return row
+        return self._scan_for_pk(key)
+    
+    def _scan_for_pk(self, key):
+        """Find the row with primary key key by decoding rows in order"""
+        for row in (self.rows if self.rows_loaded else self.iter_rows()):
+            if self.row_has_pk(row, key):
+                return row
+        return None
+    
     # String pool support methods
+    def _get_pool_columns(self):
+        """Get the 1-based indexes of columns that use the string pool"""
+        if self.m_pool_column_size <= 0:
+            return frozenset()
+        return frozenset(c for c, used in self.m_column_map.items() if used)
+    
     def is_string_pool_column(self, column_index):
         """Check if column uses string pool"""
         if column_index < 0:
@@ -547,7 +1078,30 @@ class BinaryTable:
         return self.m_column_map.get(column_index, False)
     
     def read_pool_string_by_index(self, index):
-        """Read string from string pool by index"""
+        """Read string from string pool by index (decoded once, then cached)"""
+        try:
+            value = self.m_pool_string_cache[index]
+        except KeyError:
+            self.pool_cache_misses += 1
+            value = self.m_pool_string_cache[index] = self._decode_pool_string(index)
+        else:
+            self.pool_cache_hits += 1
+        return value
+    
+    def get_pool_cache_stats(self):
+        """Get string pool cache counters for profiling"""
+        return {
+            'strings': len(self.m_pool_offset_info_array),
+            'cached': len(self.m_pool_string_cache),
+            'hits': self.pool_cache_hits,
+            'misses': self.pool_cache_misses,
+        }
+    
+    def _decode_pool_string(self, index):
+        """Decode a string from the pool content area"""
+        if self.data is None:
+            raise ValueError(f"{os.path.basename(self.filepath)} is closed, pool string {index} wasn't decoded")
+        
         if not self.m_pool_offset_info_array or len(self.m_pool_offset_info_array) == 0:
             return None
         
@@ -566,13 +1120,28 @@ class BinaryTable:
         if string_end > len(self.data):
             return None
         
-        string_bytes = self.data[string_start:string_end]
-        # Find null terminator
-        null_pos = string_bytes.find(b'\x00')
+        # Find null terminator within the string's own range
+        null_pos = self.data.find(b'\x00', string_start, string_end)
         if null_pos >= 0:
-            string_bytes = string_bytes[:null_pos]
+            string_end = null_pos
         
-        return string_bytes.decode('utf-8', errors='ignore')
+        return self.data[string_start:string_end].decode('utf-8', errors='ignore')
+    
+    def close(self):
+        """
+        Release the file mapping (mmap mode); rows that were decoded stay
+        valid. Columnar string pool columns hold pool indexes, so the
+        strings they reference are decoded into the pool cache first.
+        """
+        if self._mmap is not None:
+            if isinstance(self.rows, ColumnarRows):
+                for kind, column in zip(self.rows.kinds, self.rows.data):
+                    if kind == 'pool':
+                        for index in set(column):
+                            self.read_pool_string_by_index(index)
+            self.data = None
+            self._mmap.close()
+            self._mmap = None
     
     def get_column_names(self):
         return [name for _, name in self.columns]
@@ -580,5 +1149,42 @@ class BinaryTable:
     def get_rows(self):
         return self.rows
     
+    def iter_rows(self):
+        """
+        Yield rows as dicts while they are decoded from the content trunk.
+        
+        On a table that hasn't been load()ed, rows are decoded one at a time
+        and not kept, so output can start before the whole table is parsed
+        and memory stays flat. On a loaded table this iterates self.rows.
+        """
+        if self.rows_loaded:
+            yield from self.rows
+            return
+        
+        if self.data is None:
+            self.load_header()
+        
+        if self.is_tsv:
+            yield from self.rows
+            return
+        
+        content_start, content_end = self._get_content_bounds()
+        
+        if self.profile is not None:
+            yield from self.profile.iter_timed('decode', self._iter_content_rows(content_start, content_end),
+                                               content_end - content_start)
+        else:
+            yield from self._iter_content_rows(content_start, content_end)
+    
+    def _iter_content_rows(self, content_start, content_end):
+        if self._needs_reader():
+            yield from self._iter_reader_rows(content_start, content_end)
+        elif self.low_memory:
+            yield from self._iter_simple_rows_streamed(content_start, content_end)
+        else:
+            col_names = [name for _, name in self.columns]
+            vals, row_count = self._locate_simple_rows(content_start, content_end)
+            yield from self._iter_simple_rows(vals, row_count, col_names)
+    
     def __repr__(self):
         return f"BinaryTable('{os.path.basename(self.filepath)}', cols={self.col_count}, rows={len(self.rows)})"
\ No newline at end of file
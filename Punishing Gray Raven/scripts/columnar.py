@@ -0,0 +1,115 @@
+from array import array
+
+# Storage kind of each column type when it holds a plain number.
+# The readers return None for a zero value, so 0 is stored and mapped back.
+NUMERIC_KINDS = {
+    1: 'bool',
+    14: 'int',
+    15: 'float',
+}
+
+# array typecodes per storage kind ('object' columns use a plain list)
+TYPECODES = {
+    'bool': 'b',
+    'int': 'l',
+    'float': 'd',
+    'pool': 'l',
+    'uint': 'Q',
+}
+
+def column_kind(ctype, pooled=False):
+    """Get the storage kind for a column type"""
+    if ctype == 2 and pooled:
+        return 'pool'
+    return NUMERIC_KINDS.get(ctype, 'object')
+
+def encode_expression(kind, expr):
+    """Source expression converting a decoded value to its stored form"""
+    if kind == 'bool':
+        return f"1 if {expr} else 0"
+    if kind in ('int', 'float', 'uint', 'pool'):
+        return f"{expr} or 0"
+    return expr
+
+def new_column(kind, values=()):
+    """Create empty (or filled) storage for a column kind"""
+    typecode = TYPECODES.get(kind)
+    if typecode is None:
+        return list(values)
+    try:
+        return array(typecode, values)
+    except OverflowError:
+        # Value too wide for the typed array, keep Python ints
+        return list(values)
+
+def decode_value(kind, value, table=None):
+    """Convert a stored value back to what the row readers return"""
+    if kind == 'bool':
+        return True if value else None
+    if kind in ('int', 'float', 'uint'):
+        return value or None
+    if kind == 'pool':
+        return table.read_pool_string_by_index(value) if table else None
+    return value
+
+class ColumnarRows:
+    """
+    Struct-of-arrays row storage for a BinaryTable.
+
+    Numeric columns are kept in typed arrays and string pool columns as
+    arrays of pool indexes. Everything else (lists, dicts, fix values,
+    inline strings) is stored as a plain list per column. The object
+    behaves like the list of row dicts it replaces: len(), indexing,
+    slicing and iteration build row dicts on demand.
+    """
+
+    def __init__(self, columns, kinds, table=None):
+        self.names = [name for _, name in columns]
+        self.kinds = list(kinds)
+        self.table = table
+        self.data = [new_column(kind) for kind in self.kinds]
+        self.count = 0
+
+    def append(self, values):
+        """Append one row of already encoded values"""
+        for column, value in zip(self.data, values):
+            column.append(value)
+        self.count += 1
+
+    def set_column(self, col_idx, values):
+        """Replace a whole column with encoded values"""
+        self.data[col_idx] = new_column(self.kinds[col_idx], values)
+
+    def decode_value(self, col_idx, value):
+        """Convert a stored value of a column back to what the row readers return"""
+        return decode_value(self.kinds[col_idx], value, self.table)
+
+    def column(self, name):
+        """Get the raw storage of a column by name"""
+        return self.data[len(self.names) - 1 - self.names[::-1].index(name)]
+
+    def row(self, index):
+        """Build the row dict at index"""
+        return {
+            name: self.decode_value(col_idx, self.data[col_idx][index])
+            for col_idx, name in enumerate(self.names)
+        }
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self.row(i) for i in range(*index.indices(self.count))]
+        if index < 0:
+            index += self.count
+        if not 0 <= index < self.count:
+            raise IndexError("row index out of range")
+        return self.row(index)
+
+    def __iter__(self):
+        for index in range(self.count):
+            yield self.row(index)
+
+    def __repr__(self):
+        return f"ColumnarRows(cols={len(self.names)}, rows={self.count})"
@@ -1,28 +1,33 @@
+import os
 import sys
-import csv
+from collections import deque
+from itertools import islice
 from binary_table import BinaryTable
+from export import EXPORT_FORMATS, export_stream, output_extension
 
-def write_tsv(outpath, table):
-    """Write table to TSV file"""
-    with open(outpath, "w", encoding="utf-8", newline="") as f:
-        w = csv.writer(f, delimiter="\t")
-        w.writerow(table.get_column_names())
-        for row in table.get_rows():
-            w.writerow([row.get(col, "") for col in table.get_column_names()])
+def write_output(outpath, table, output_format='tsv'):
+    """Write table to outpath in output_format (TSV, Parquet, Arrow or native)"""
+    with open(outpath, "wb") as f:
+        return export_stream(f, table, output_format)
 
 def main():
     if len(sys.argv) < 2:
-        print("Usage: python debug.py <file.tab.bytes>")
+        print("Usage: python debug.py <file.tab.bytes> [tsv|parquet|arrow|native]")
         return
     
     input_path = sys.argv[1]
+    output_format = sys.argv[2] if len(sys.argv) > 2 else 'tsv'
+    if output_format not in EXPORT_FORMATS:
+        print(f"Unknown output format: {output_format}")
+        return
     
-    # Parse the table
+    # Parse the header only, rows are decoded while they are printed and written
     print(f"Loading {input_path}...")
-    table = BinaryTable(input_path).load()
+    table = BinaryTable(input_path, use_mmap=True, low_memory=True)
+    table.load_header()
     
     # Show info
-    print(f"\n{table}")
+    print(f"\n{os.path.basename(input_path)}: cols={table.col_count}, rows={table.row_count}")
     print(f"[header] has_pk={table.has_pk}, pk_idx={table.pk_idx}, magic=0x{table.magic:08X}")
     
     print("\n[columns]")
@@ -39,18 +44,25 @@ def main():
         print(f"  {col_name} ({type_names.get(col_type, f'type{col_type}')})")
     
     print("\n[data] First 3 rows:")
-    for i, row in enumerate(table.get_rows()[:3]):
+    rows = table.iter_rows()
+    for i, row in enumerate(islice(rows, 3)):
         print(f"  {i}: {row}")
     
-    if len(table.rows) > 3:
+    # Only the last of the remaining rows is kept
+    last = deque(enumerate(rows, 3), maxlen=1)
+    if last:
+        i, row = last[0]
         print("\n[data] Last row:")
-        print(f"  {len(table.rows)-1}: {table.rows[-1]}")
+        print(f"  {i}: {row}")
     
     # Write output
     base_name = input_path.replace('.tab.bytes', '')
-    output_path = f"{base_name}.tsv"
-    write_tsv(output_path, table)
-    print(f"\n[output] Wrote {output_path}")
+    output_path = f"{base_name}{output_extension(table, output_format)}"
+    try:
+        size, rows = write_output(output_path, table, output_format)
+    finally:
+        table.close()
+    print(f"\n[output] Wrote {output_path} ({rows} rows, {size:,} bytes)")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,369 @@
+import csv
+import sys
+import json
+import struct
+from array import array
+from reader import expand_fix
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pyarrow is optional, the native format is used instead
+    pa = None
+    pq = None
+
+# Output file extension per export format
+EXPORT_FORMATS = {
+    'tsv': '.tsv',
+    'parquet': '.parquet',
+    'arrow': '.arrow',
+    'native': '.pgrc',
+}
+
+# Column types that are plain numbers; None is the readers' encoding of zero
+BOOL_TYPES = (1,)
+INT_TYPES = (14,)
+FLOAT_TYPES = (3, 15)
+
+# Dict column types whose keys are ints (JSON turns them into strings)
+INT_KEY_TYPES = (10, 11, 13)
+
+NATIVE_MAGIC = b'PGRC'
+NATIVE_VERSION = 1
+
+class CountingWriter:
+    """Text sink for csv.writer that encodes to a binary file and counts bytes"""
+
+    def __init__(self, f, encoding="utf-8"):
+        self.f = f
+        self.encoding = encoding
+        self.size = 0
+
+    def write(self, text):
+        data = text.encode(self.encoding)
+        self.size += len(data)
+        return self.f.write(data)
+
+# Column types whose values depend on BinaryTable.fix_mode
+FIX_COMPACT_TYPES = (8, 16, 17, 18, 19, 20, 21)
+
+def _open_table(table):
+    """Make sure the header (column list) is known before rows are streamed"""
+    if table.data is None and not table.rows_loaded:
+        table.load_header()
+    return table
+
+def _iter_export_rows(table):
+    """Iterate rows with compact fix values expanded back to the dict form"""
+    fix_columns = [
+        (ctype, name) for ctype, name in table.columns if ctype in FIX_COMPACT_TYPES
+    ]
+    if getattr(table, 'fix_mode', 'dict') == 'dict' or not fix_columns:
+        yield from table.iter_rows()
+        return
+    
+    for row in table.iter_rows():
+        row = dict(row)
+        for ctype, name in fix_columns:
+            if name in row:
+                row[name] = expand_fix(ctype, row[name])
+        yield row
+
+def write_tsv_stream(f, table):
+    """
+    Write table as TSV to a binary file object, streaming rows as they are
+    decoded. Returns (bytes written, rows written).
+    """
+    _open_table(table)
+    out = CountingWriter(f)
+    w = csv.writer(out, delimiter="\t")
+    columns = table.get_column_names()
+    w.writerow(columns)
+    row_count = 0
+    for row in _iter_export_rows(table):
+        w.writerow([row.get(col, "") for col in columns])
+        row_count += 1
+    return out.size, row_count
+
+def collect_columns(table):
+    """Gather row values per column (by position) with numeric None mapped to zero"""
+    _open_table(table)
+    columns = [[] for _ in table.columns]
+    appends = [column.append for column in columns]
+    names = table.get_column_names()
+
+    converters = []
+    for ctype, _ in table.columns:
+        if ctype in BOOL_TYPES:
+            converters.append(lambda v: bool(v))
+        elif ctype in INT_TYPES:
+            converters.append(lambda v: v or 0)
+        elif ctype in FLOAT_TYPES:
+            converters.append(lambda v: float(v) if v not in (None, "") else 0.0)
+        else:
+            converters.append(None)
+
+    for row in _iter_export_rows(table):
+        for append, convert, name in zip(appends, converters, names):
+            value = row.get(name)
+            append(convert(value) if convert else value)
+
+    return columns
+
+# pyarrow backend
+def arrow_type(ctype):
+    """Arrow type for a column type"""
+    fix = pa.float64()
+    fix2 = pa.struct([('x', fix), ('y', fix)])
+    fix3 = pa.struct([('x', fix), ('y', fix), ('z', fix)])
+    quat = pa.struct([('x', fix), ('y', fix), ('z', fix), ('w', fix)])
+    return {
+        1: pa.bool_(),
+        2: pa.string(),
+        3: fix,
+        4: pa.list_(pa.string()),
+        5: pa.list_(pa.bool_()),
+        6: pa.list_(pa.int64()),
+        7: pa.list_(pa.float64()),
+        8: pa.list_(fix),
+        9: pa.map_(pa.string(), pa.string()),
+        10: pa.map_(pa.int64(), pa.int64()),
+        11: pa.map_(pa.int64(), pa.string()),
+        12: pa.map_(pa.string(), pa.int64()),
+        13: pa.map_(pa.int64(), pa.float64()),
+        14: pa.int64(),
+        15: pa.float64(),
+        16: fix2,
+        17: fix3,
+        18: quat,
+        19: pa.list_(fix2),
+        20: pa.list_(fix3),
+        21: pa.list_(quat),
+    }.get(ctype, pa.string())
+
+def _normalize_nested(ctype, value):
+    """
+    Give nested values the element types of their column: bools and floats
+    in lists, and "" or 0 instead of a None dict key (how the readers
+    return an empty string / zero key).
+    """
+    if value is None:
+        return None
+    if ctype == 5:
+        return [bool(x) for x in value]
+    if ctype in (7, 8):
+        return [float(x or 0) for x in value]
+    if 9 <= ctype <= 13 and None in value:
+        empty_key = "" if ctype in (9, 12) else 0
+        return {empty_key if k is None else k: v for k, v in value.items()}
+    return value
+
+def _arrow_values(ctype, values):
+    """Adapt decoded values to what pyarrow accepts for the column type"""
+    values = [_normalize_nested(ctype, v) for v in values]
+    if 9 <= ctype <= 13:
+        # Maps take (key, value) pairs
+        return [None if v is None else list(v.items()) for v in values]
+    if ctype not in range(1, 22):
+        return [None if v is None else str(v) for v in values]
+    return values
+
+def to_arrow_table(table):
+    """Build a pyarrow Table typed from BinaryTable.columns"""
+    if pa is None:
+        raise RuntimeError("pyarrow is not installed")
+
+    columns = collect_columns(table)
+    fields = []
+    arrays = []
+    for (ctype, name), values in zip(table.columns, columns):
+        ptype = arrow_type(ctype)
+        fields.append(pa.field(str(name), ptype, metadata={'pgr_type': str(ctype)}))
+        arrays.append(pa.array(_arrow_values(ctype, values), type=ptype))
+
+    return pa.Table.from_arrays(arrays, schema=pa.schema(fields))
+
+def write_parquet_stream(f, table):
+    """Write table as Parquet to a binary file object, returns (bytes, rows)"""
+    arrow_table = to_arrow_table(table)
+    start = f.tell()
+    pq.write_table(arrow_table, f)
+    return f.tell() - start, arrow_table.num_rows
+
+def write_arrow_stream(f, table):
+    """Write table as an Arrow IPC file to a binary file object, returns (bytes, rows)"""
+    arrow_table = to_arrow_table(table)
+    start = f.tell()
+    with pa.ipc.new_file(f, arrow_table.schema) as writer:
+        writer.write_table(arrow_table)
+    return f.tell() - start, arrow_table.num_rows
+
+# Native fallback format
+#
+#   b'PGRC' | u32 version | u32 header length | header JSON | column blocks
+#
+# The header lists every column with its name, PGR type, encoding and block
+# size. Blocks are little-endian: 'b' int8 bools, 'q' int64, 'd' float64,
+# 'str' and 'json' a null mask (1 byte per row), u32 end offsets per row and
+# the UTF-8 data (JSON text per value for nested types).
+def _native_encoding(ctype):
+    if ctype in BOOL_TYPES:
+        return 'b'
+    if ctype in INT_TYPES:
+        return 'q'
+    if ctype in FLOAT_TYPES:
+        return 'd'
+    if ctype == 2:
+        return 'str'
+    return 'json'
+
+def _pack_array(typecode, values):
+    arr = array(typecode, values)
+    if sys.byteorder == 'big':
+        arr.byteswap()
+    return arr.tobytes()
+
+def _pack_strings(values):
+    mask = bytearray(len(values))
+    data = bytearray()
+    offsets = []
+    for i, value in enumerate(values):
+        if value is not None:
+            mask[i] = 1
+            data += value.encode('utf-8')
+        offsets.append(len(data))
+    return bytes(mask) + _pack_array('I', offsets) + bytes(data)
+
+def _encode_column(ctype, values):
+    encoding = _native_encoding(ctype)
+    if encoding == 'b':
+        return encoding, _pack_array('b', [1 if v else 0 for v in values])
+    if encoding == 'q':
+        try:
+            return encoding, _pack_array('q', values)
+        except OverflowError:
+            # Raw varints wider than int64, keep them as JSON numbers
+            encoding = 'json'
+    if encoding == 'd':
+        return encoding, _pack_array('d', values)
+    if encoding == 'str':
+        return encoding, _pack_strings([None if v is None else str(v) for v in values])
+    values = [_normalize_nested(ctype, v) for v in values]
+    return encoding, _pack_strings([
+        None if v is None else json.dumps(v, ensure_ascii=False) for v in values
+    ])
+
+def write_native_stream(f, table):
+    """Write table in the native PGRC columnar format, returns (bytes, rows)"""
+    if array('I').itemsize != 4:
+        raise RuntimeError("native format needs 4-byte 'I' arrays")
+
+    columns = collect_columns(table)
+    row_count = len(columns[0]) if columns else 0
+
+    header = {'rows': row_count, 'columns': []}
+    blocks = []
+    for (ctype, name), values in zip(table.columns, columns):
+        encoding, block = _encode_column(ctype, values)
+        header['columns'].append({'name': name, 'type': ctype, 'encoding': encoding, 'size': len(block)})
+        blocks.append(block)
+
+    header_bytes = json.dumps(header, ensure_ascii=False).encode('utf-8')
+    size = f.write(NATIVE_MAGIC + struct.pack('<II', NATIVE_VERSION, len(header_bytes)))
+    size += f.write(header_bytes)
+    for block in blocks:
+        size += f.write(block)
+    return size, row_count
+
+def _unpack_array(typecode, data):
+    arr = array(typecode)
+    arr.frombytes(data)
+    if sys.byteorder == 'big':
+        arr.byteswap()
+    return arr
+
+def _unpack_strings(data, rows):
+    mask = data[:rows]
+    offsets = _unpack_array('I', data[rows:rows + 4 * rows])
+    text = data[rows + 4 * rows:]
+    values = []
+    start = 0
+    for i in range(rows):
+        end = offsets[i]
+        values.append(text[start:end].decode('utf-8') if mask[i] else None)
+        start = end
+    return values
+
+def _restore_keys(ctype, value):
+    """Turn JSON string keys back into ints for int-keyed dict types"""
+    if value is None or ctype not in INT_KEY_TYPES:
+        return value
+    return {int(k): v for k, v in value.items()}
+
+def read_native(path):
+    """
+    Read a PGRC file back. Returns (columns, values) where columns is a
+    list of (type, name) like BinaryTable.columns and values a list with
+    one array or list per column.
+    """
+    with open(path, 'rb') as f:
+        data = f.read()
+
+    if data[:4] != NATIVE_MAGIC:
+        raise ValueError(f"{path} is not a PGRC file")
+
+    version, header_len = struct.unpack_from('<II', data, 4)
+    if version != NATIVE_VERSION:
+        raise ValueError(f"Unsupported PGRC version {version}")
+
+    position = 12
+    header = json.loads(data[position:position + header_len].decode('utf-8'))
+    position += header_len
+    rows = header['rows']
+
+    columns = []
+    values = []
+    for column in header['columns']:
+        block = data[position:position + column['size']]
+        position += column['size']
+        ctype = column['type']
+        encoding = column['encoding']
+
+        if encoding in ('b', 'q', 'd'):
+            col_values = _unpack_array(encoding, block)
+        elif encoding == 'str':
+            col_values = _unpack_strings(block, rows)
+        else:
+            col_values = [
+                None if v is None else _restore_keys(ctype, json.loads(v))
+                for v in _unpack_strings(block, rows)
+            ]
+
+        columns.append((ctype, column['name']))
+        values.append(col_values)
+
+    return columns, values
+
+def output_extension(table, output_format='tsv'):
+    """File extension export_stream writes table with"""
+    _open_table(table)
+    return EXPORT_FORMATS['tsv' if table.is_tsv else output_format]
+
+def export_stream(f, table, output_format='tsv'):
+    """
+    Write table to f in output_format, returns (bytes written, rows written).
+    Inputs that are already TSV have no column types, so they are written
+    as TSV whatever the format (see output_extension).
+    """
+    _open_table(table)
+    if output_format == 'tsv' or table.is_tsv:
+        return write_tsv_stream(f, table)
+    if output_format in ('parquet', 'arrow'):
+        if pa is None:
+            raise RuntimeError(f"{output_format} export needs pyarrow (use --format native without it)")
+        if output_format == 'parquet':
+            return write_parquet_stream(f, table)
+        return write_arrow_stream(f, table)
+    if output_format == 'native':
+        return write_native_stream(f, table)
+    raise ValueError(f"Unknown export format: {output_format}")
@@ -0,0 +1,192 @@
+import os
+import sys
+import mmap
+import struct
+from binary_table import BinaryTable
+
+# Reverse Id index file
+#
+#   b'PGRI' | u32 version | u32 table count | u32 entry count | u32 names length
+#   | table paths (UTF-8, '\0' separated) | entries
+#
+# Entries are '<qII' (Id, table number, row offset in the content trunk),
+# 16 bytes each and sorted by Id then table, so a lookup is a binary
+# search over the mapped file and resolving a row is a single seek.
+INDEX_MAGIC = b'PGRI'
+INDEX_VERSION = 1
+INDEX_NAME = 'id_index.pgri'
+
+HEADER = struct.Struct('<4sIIII')
+ENTRY = struct.Struct('<qII')
+
+def table_ids(path):
+    """
+    Get (Id, row offset) pairs of a table keyed by an int primary key.
+    Tables without one (or TSV inputs) give an empty list. When the index
+    trunks don't validate, the offsets are found by decoding the rows.
+    """
+    table = BinaryTable(path, use_mmap=True)
+    try:
+        table.load_header()
+        if table.is_tsv or not table.has_pk or table.pk_idx >= len(table.columns):
+            return []
+        if table.columns[table.pk_idx][0] != 14:
+            return []
+        try:
+            offsets = table.get_primary_key_offsets()
+        except ValueError:
+            offsets = table.scan_primary_key_offsets()
+        return list(offsets.items())
+    finally:
+        table.close()
+
+def build_id_index(tab_files, input_dir, output_path, verbose=False):
+    """
+    Build the reverse Id index over tab_files and write it to output_path.
+    Returns (tables indexed, entries written, skipped) where skipped lists
+    (table path, error) of the tables whose Ids couldn't be read.
+    """
+    names = []
+    entries = []
+    skipped = []
+    for filepath in tab_files:
+        try:
+            ids = table_ids(filepath)
+        except Exception as e:
+            skipped.append((os.path.relpath(filepath, input_dir).replace(os.sep, '/'), str(e)))
+            if verbose:
+                print(f"  Skipping {filepath}: {e}")
+            continue
+        if not ids:
+            continue
+        table_no = len(names)
+        names.append(os.path.relpath(filepath, input_dir).replace(os.sep, '/'))
+        entries.extend((key, table_no, offset) for key, offset in ids)
+
+    entries.sort()
+    names_data = '\0'.join(names).encode('utf-8')
+
+    # Unique per call so concurrent builds of the same index don't write into one temp file
+    temp_path = f"{output_path}.{os.getpid()}.{os.urandom(4).hex()}.tmp"
+    try:
+        with open(temp_path, 'xb') as f:
+            f.write(HEADER.pack(INDEX_MAGIC, INDEX_VERSION, len(names), len(entries), len(names_data)))
+            f.write(names_data)
+            f.write(b''.join(ENTRY.pack(*entry) for entry in entries))
+        os.replace(temp_path, output_path)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+    return len(names), len(entries), skipped
+
+class IdIndex:
+    """Read-only view of an index file, mapped instead of read into memory"""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, table_count, self.count, names_len = HEADER.unpack_from(self._mmap, 0)
+        if magic != INDEX_MAGIC:
+            raise ValueError(f"{path} is not an Id index")
+        if version != INDEX_VERSION:
+            raise ValueError(f"Unsupported Id index version {version}")
+
+        names_start = HEADER.size
+        names = self._mmap[names_start:names_start + names_len].decode('utf-8')
+        self.tables = names.split('\0') if table_count else []
+        self.entries_start = names_start + names_len
+
+    def _id_at(self, position):
+        return struct.unpack_from('<q', self._mmap, self.entries_start + position * ENTRY.size)[0]
+
+    def _first_position(self, key):
+        low, high = 0, self.count
+        while low < high:
+            mid = (low + high) // 2
+            if self._id_at(mid) < key:
+                low = mid + 1
+            else:
+                high = mid
+        return low
+
+    def lookup(self, key):
+        """Get [(table path, row offset)] of every table with a row keyed key"""
+        matches = []
+        position = self._first_position(key)
+        while position < self.count:
+            entry_id, table_no, offset = ENTRY.unpack_from(
+                self._mmap, self.entries_start + position * ENTRY.size)
+            if entry_id != key:
+                break
+            matches.append((self.tables[table_no], offset))
+            position += 1
+        return matches
+
+    def resolve(self, key, input_dir):
+        """
+        Get [(table path, row dict)] for key, decoding each row with a single
+        seek. A row that doesn't hold key (the table changed since the index
+        was built) is looked up again with get_by_pk.
+        """
+        rows = []
+        for table_path, offset in self.lookup(key):
+            table = BinaryTable(os.path.join(input_dir, table_path), use_mmap=True)
+            try:
+                table.load_header()
+                try:
+                    row = table.get_row_at(offset)
+                except Exception:
+                    row = None
+                if row is None or not table.row_has_pk(row, key):
+                    row = table.get_by_pk(key)
+                if row is not None:
+                    rows.append((table_path, row))
+            finally:
+                table.close()
+        return rows
+
+    def close(self):
+        self._mmap.close()
+
+    def __len__(self):
+        return self.count
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def main():
+    if len(sys.argv) < 3 or sys.argv[1] not in ('build', 'lookup'):
+        print("Usage:")
+        print(f"  python idindex.py build <input_directory> [output_file]   (default: <input_directory>/{INDEX_NAME})")
+        print("  python idindex.py lookup <index_file> <id> [input_directory]")
+        return
+
+    if sys.argv[1] == 'build':
+        input_dir = sys.argv[2]
+        output_path = sys.argv[3] if len(sys.argv) > 3 else os.path.join(input_dir, INDEX_NAME)
+        tab_files = []
+        for root, dirs, files in os.walk(input_dir):
+            for file in files:
+                if file.endswith('.tab.bytes'):
+                    tab_files.append(os.path.join(root, file))
+        tables, entries, _ = build_id_index(tab_files, input_dir, output_path, verbose=True)
+        print(f"Indexed {entries:,} Ids from {tables} tables into {output_path}")
+        return
+
+    with IdIndex(sys.argv[2]) as index:
+        key = int(sys.argv[3])
+        if len(sys.argv) > 4:
+            for table_path, row in index.resolve(key, sys.argv[4]):
+                print(f"{table_path}: {row}")
+        else:
+            for table_path, offset in index.lookup(key):
+                print(f"{table_path} @ {offset}")
+
+if __name__ == "__main__":
+    main()
@@ -2,8 +2,12 @@ import os
 import sys
 import json
 import shutil
+import codecs
+import argparse
 from pathlib import Path
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from watch import TreeWatcher
 
 def convert_lua_bytes(src_path, dest_path):
     """Convert a single .lua.bytes file to .lua"""
@@ -11,20 +15,27 @@ def convert_lua_bytes(src_path, dest_path):
         with open(src_path, "rb") as f:
             data = f.read()
 
-        # Try UTF-8 first, fallback to other encodings if needed
-        try:
-            text = data.decode("utf-8")
-        except UnicodeDecodeError:
-            text = data.decode("utf-8-sig", errors="ignore")
+        # Valid UTF-8 (checked without decoding when it's plain ASCII) is
+        # written back byte for byte; anything else loses a leading BOM and
+        # its invalid sequences
+        if data.isascii():
+            output = data
+        else:
+            try:
+                data.decode("utf-8")
+                output = data
+            except UnicodeDecodeError:
+                body = data[len(codecs.BOM_UTF8):] if data.startswith(codecs.BOM_UTF8) else data
+                output = body.decode("utf-8", errors="ignore").encode("utf-8")
 
-        with open(dest_path, "w", encoding="utf-8") as f:
-            f.write(text)
+        with open(dest_path, "wb") as f:
+            f.write(output)
 
         return {
             'success': True,
             'status': 'PASS',
             'input_size': len(data),
-            'output_size': len(text.encode('utf-8'))
+            'output_size': len(output)
         }
 
     except Exception as e:
@@ -36,16 +47,82 @@ def convert_lua_bytes(src_path, dest_path):
             'output_size': 0
         }
 
+def _convert_task(task):
+    return convert_lua_bytes(*task)
+
+def convert_files(tasks, jobs=1, executor='thread'):
+    """Convert (src_path, dest_path) tasks and yield results in task order"""
+    if jobs <= 1:
+        for task in tasks:
+            yield _convert_task(task)
+        return
+    
+    if executor == 'process':
+        # Batch small files per worker round trip
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            yield from pool.map(_convert_task, tasks, chunksize=max(1, len(tasks) // (jobs * 8)))
+    else:
+        with ThreadPoolExecutor(max_workers=jobs) as pool:
+            yield from pool.map(_convert_task, tasks)
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        description="Convert .lua.bytes files to .lua",
+        epilog="Directory structure will be preserved from input to output",
+    )
+    parser.add_argument("input_directory", help="Directory containing .lua.bytes files")
+    parser.add_argument("output_directory", nargs="?", default="./lua",
+                        help="Base directory for output (default: './lua')")
+    parser.add_argument("-j", "--jobs", type=int, default=1,
+                        help="Number of workers (0 = one per CPU, default: 1)")
+    parser.add_argument("--executor", choices=("thread", "process"), default="thread",
+                        help="Worker type for --jobs (default: thread, the work is mostly I/O)")
+    parser.add_argument("--watch", action="store_true",
+                        help="After the initial run, keep watching the input tree and convert new or "
+                             "modified files as they appear (inotify, polling fallback)")
+    parser.add_argument("--debounce", type=float, default=2.0,
+                        help="Watch mode: seconds without new changes before a batch is converted (default: 2)")
+    return parser
+
+def output_path_for(filepath, input_dir, output_dir):
+    """Output .lua path of an input, preserving directory structure (creates the directory)"""
+    relative_dir = os.path.dirname(os.path.relpath(filepath, input_dir))
+    output_filename = os.path.basename(filepath).replace('.lua.bytes', '.lua')
+    output_subdir = os.path.join(output_dir, relative_dir)
+    os.makedirs(output_subdir, exist_ok=True)
+    return os.path.join(output_subdir, output_filename)
+
+def watch_and_convert(args, input_dir, output_dir, jobs):
+    """Convert new or modified .lua.bytes files under input_dir as they appear"""
+    watcher = TreeWatcher(input_dir, ('.lua.bytes',), debounce=args.debounce)
+    print(f"\nWatching {os.path.abspath(input_dir)} for new or modified .lua.bytes files "
+          f"({watcher.mode}, Ctrl+C to stop)")
+    
+    try:
+        for changed in watcher.batches():
+            tasks = [(filepath, output_path_for(filepath, input_dir, output_dir)) for filepath in changed]
+            print(f"\n[{datetime.now():%H:%M:%S}] {len(tasks)} changed file(s)")
+            for (filepath, _), result in zip(tasks, convert_files(tasks, jobs, args.executor)):
+                relative_path = os.path.relpath(filepath, input_dir)
+                if result['success']:
+                    print(f"  {relative_path} ✓ ({result['output_size']:,} bytes)")
+                else:
+                    print(f"  {relative_path} ✗ {result['status']}: {result.get('error', 'Unknown error')}")
+    except KeyboardInterrupt:
+        print("\nStopped watching")
+    finally:
+        watcher.close()
+
 def main():
+    parser = build_parser()
     if len(sys.argv) < 2:
-        print("Usage: python lua.py <input_directory> [output_directory]")
-        print("  input_directory: Directory containing .lua.bytes files")
-        print("  output_directory: Base directory for output (default: './lua')")
-        print("\nDirectory structure will be preserved from input to output")
+        parser.print_help()
         return
     
-    input_dir = sys.argv[1]
-    output_dir = sys.argv[2] if len(sys.argv) > 2 else "./lua"
+    args = parser.parse_args()
+    input_dir = args.input_directory
+    output_dir = args.output_directory
+    jobs = args.jobs if args.jobs > 0 else (os.cpu_count() or 1)
     
     # Find all .lua.bytes files
     print(f"Searching for .lua.bytes files in: {input_dir}")
@@ -59,9 +136,13 @@ def main():
     
     if not lua_files:
         print("No .lua.bytes files found!")
+        if args.watch:
+            watch_and_convert(args, input_dir, output_dir, jobs)
         return
     
     print(f"Found {len(lua_files)} .lua.bytes files")
+    if jobs > 1:
+        print(f"Using {jobs} worker {args.executor}s")
     print(f"Output will preserve directory structure to: {os.path.abspath(output_dir)}\n")
     print("=" * 80)
     
@@ -80,21 +161,19 @@ def main():
     passed_count = 0
     failed_count = 0
     
-    for i, filepath in enumerate(lua_files, 1):
+    # Calculate output paths preserving directory structure
+    tasks = [(filepath, output_path_for(filepath, input_dir, output_dir)) for filepath in lua_files]
+    
+    converted = convert_files(tasks, jobs, args.executor)
+    
+    for i, (filepath, output_path) in enumerate(tasks, 1):
         filename = os.path.basename(filepath)
         relative_path = os.path.relpath(filepath, input_dir)
-        relative_dir = os.path.dirname(relative_path)
         
         print(f"[{i}/{len(lua_files)}] {relative_path}...", end=" ", flush=True)
         
-        # Calculate output path preserving directory structure
-        output_filename = filename.replace('.lua.bytes', '.lua')
-        output_subdir = os.path.join(output_dir, relative_dir)
-        os.makedirs(output_subdir, exist_ok=True)
-        output_path = os.path.join(output_subdir, output_filename)
-        
         # Convert the file
-        result = convert_lua_bytes(filepath, output_path)
+        result = next(converted)
         
         # Build result entry
         entry = {
@@ -144,6 +223,9 @@ def main():
     print("\nResults saved to:")
     print(f"  Lua files: {os.path.abspath(output_dir)}")
     #print(f"  JSON report: {json_output}")
+    
+    if args.watch:
+        watch_and_convert(args, input_dir, output_dir, jobs)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
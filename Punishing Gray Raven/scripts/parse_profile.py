@@ -0,0 +1,110 @@
+import time
+from contextlib import contextmanager
+
+class ParseProfile:
+    """
+    Per-phase timings and counters of one BinaryTable parse.
+
+    Phases nest: time spent in an inner phase is only counted there, so
+    the phase times add up to the total. Each phase also records the
+    bytes it covered and the rows it produced.
+    """
+
+    def __init__(self):
+        self.phases = {}
+        self._open = []
+
+    def add(self, name, seconds, nbytes=0, rows=0):
+        phase = self.phases.get(name)
+        if phase is None:
+            phase = self.phases[name] = {'seconds': 0.0, 'bytes': 0, 'rows': 0}
+        phase['seconds'] += seconds
+        phase['bytes'] += nbytes
+        phase['rows'] += rows
+
+    def _start(self):
+        self._open.append(0.0)
+        return time.perf_counter()
+
+    def _stop(self, name, start, nbytes=0, rows=0):
+        elapsed = time.perf_counter() - start
+        inner = self._open.pop()
+        if self._open:
+            self._open[-1] += elapsed
+        self.add(name, elapsed - inner, nbytes, rows)
+
+    @contextmanager
+    def phase(self, name, nbytes=0):
+        """Time the body of a with block as phase name"""
+        start = self._start()
+        try:
+            yield
+        finally:
+            self._stop(name, start, nbytes)
+
+    def iter_timed(self, name, rows, nbytes=0):
+        """Yield from rows, timing each step (not the consumer) as phase name"""
+        self.add(name, 0.0, nbytes)
+        iterator = iter(rows)
+        while True:
+            start = self._start()
+            try:
+                row = next(iterator)
+            except StopIteration:
+                self._stop(name, start)
+                return
+            self._stop(name, start, rows=1)
+            yield row
+
+    def total_seconds(self):
+        return sum(phase['seconds'] for phase in self.phases.values())
+
+    def to_dict(self, pool_stats=None):
+        """JSON-ready summary; pool_stats from BinaryTable.get_pool_cache_stats"""
+        result = {
+            'total_seconds': round(self.total_seconds(), 6),
+            'rows': sum(phase['rows'] for phase in self.phases.values()),
+            'phases': {
+                name: dict(phase, seconds=round(phase['seconds'], 6))
+                for name, phase in self.phases.items()
+            },
+        }
+        if pool_stats is not None:
+            result['pool'] = dict(pool_stats, lookups=pool_stats['hits'] + pool_stats['misses'])
+        return result
+
+def merge_profiles(profiles):
+    """Sum to_dict() summaries of several tables per phase"""
+    merged = {'tables': 0, 'total_seconds': 0.0, 'rows': 0, 'pool_lookups': 0, 'phases': {}}
+    for profile in profiles:
+        merged['tables'] += 1
+        merged['total_seconds'] += profile['total_seconds']
+        merged['rows'] += profile['rows']
+        merged['pool_lookups'] += profile.get('pool', {}).get('lookups', 0)
+        for name, phase in profile['phases'].items():
+            total = merged['phases'].setdefault(name, {'seconds': 0.0, 'bytes': 0, 'rows': 0})
+            for key in total:
+                total[key] += phase[key]
+
+    merged['total_seconds'] = round(merged['total_seconds'], 6)
+    for phase in merged['phases'].values():
+        phase['seconds'] = round(phase['seconds'], 6)
+    return merged
+
+def slowest_tables(profiles, count=10):
+    """
+    Rank (name, to_dict() summary) pairs by total time. Returns a list of
+    dicts with the table, its total seconds, rows and its slowest phase.
+    """
+    ranked = sorted(profiles, key=lambda item: item[1]['total_seconds'], reverse=True)
+    result = []
+    for name, profile in ranked[:count]:
+        phases = profile['phases']
+        top = max(phases, key=lambda p: phases[p]['seconds']) if phases else None
+        result.append({
+            'table': name,
+            'total_seconds': profile['total_seconds'],
+            'rows': profile['rows'],
+            'slowest_phase': top,
+        })
+    return result
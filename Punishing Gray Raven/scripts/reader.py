@@ -1,8 +1,163 @@
 import struct
-from typing import Optional, List, Dict, Any
+from array import array
+from typing import Optional, List, Dict, Any, Union
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional, the pure-Python decoder is used instead
+    np = None
+
+# Divisors for fixed-point values, indexed by the 7-bit exponent
+FIX_SCALE = tuple(10 ** exp for exp in range(128))
+
+# How fix2/fix3/quaternion values (and lists of them) are returned:
+#   'dict'   {'x': .., 'y': ..} per value (TSV output uses this form)
+#   'tuple'  (x, y, ...) per value
+#   'packed' array('d') of the components; lists are one flat array
+FIX_MODES = ('dict', 'tuple', 'packed')
+
+# Component names of the fix vector types (plain and list forms)
+FIX_VECTOR_KEYS = {
+    16: 'xy', 17: 'xyz', 18: 'xyzw',
+    19: 'xy', 20: 'xyz', 21: 'xyzw',
+}
+
+def expand_fix(ctype, value):
+    """Convert a compact ('tuple'/'packed') fix value back to the form of fix_mode 'dict'"""
+    if ctype == 8 and isinstance(value, array):
+        return list(value)
+    
+    keys = FIX_VECTOR_KEYS.get(ctype)
+    if keys is None or value is None or isinstance(value, dict):
+        return value
+    
+    if ctype < 19:
+        return dict(zip(keys, value))
+    
+    if value and not isinstance(value[0], (tuple, dict)):
+        # Packed list: one flat array of components
+        width = len(keys)
+        value = [value[i:i + width] for i in range(0, len(value), width)]
+    return [item if isinstance(item, dict) else dict(zip(keys, item)) for item in value]
+
+
+def _decode_uleb128_python(buf) -> Union[array, List[int]]:
+    """Decode every varint in buf with a single tight loop over the bytes"""
+    vals = []
+    append = vals.append
+    value = 0
+    shift = 0
+    
+    for b in buf:
+        if b < 0x80:
+            append(value | (b << shift))
+            value = 0
+            shift = 0
+        else:
+            value |= (b & 0x7F) << shift
+            shift += 7
+    
+    # Trailing varint without a terminating byte (same as read_uleb128 at EOF)
+    if shift:
+        append(value)
+    
+    try:
+        return array('Q', vals)
+    except OverflowError:
+        # Wider than 64 bits, keep the plain Python ints
+        return vals
+
+
+def _decode_uleb128_numpy(buf):
+    """Decode every varint in buf using a vectorized continuation-bit scan"""
+    b = np.frombuffer(buf, dtype=np.uint8)
+    
+    terminal = b < 0x80
+    if not terminal[-1]:
+        terminal[-1] = True
+    
+    ends = np.flatnonzero(terminal)
+    if len(ends) == len(b):
+        # Every varint is a single byte (a trailing one may still carry the continuation bit)
+        return (b & 0x7F).astype(np.uint64)
+    
+    starts = np.empty_like(ends)
+    starts[0] = 0
+    starts[1:] = ends[:-1] + 1
+    lengths = ends - starts + 1
+    
+    if lengths.max() > 9:
+        # Would overflow uint64
+        return None
+    
+    shifts = (np.arange(len(b)) - np.repeat(starts, lengths)) * 7
+    payload = (b & 0x7F).astype(np.uint64) << shifts.astype(np.uint64)
+    return np.add.reduceat(payload, starts)
+
+
+def decode_uleb128_array(data, start: int = 0, end: int = None):
+    """
+    Decode all unsigned LEB128 integers in data[start:end] in one call.
+    
+    Returns a compact integer array (a NumPy uint64 array when NumPy is
+    installed, otherwise an array('Q')). Zero values are kept as 0, unlike
+    read_uleb128 which maps them to None.
+    """
+    if end is None:
+        end = len(data)
+    
+    if end <= start:
+        return array('Q')
+    
+    buf = data if (start == 0 and end == len(data)) else memoryview(data)[start:end]
+    
+    if np is not None:
+        vals = _decode_uleb128_numpy(buf)
+        if vals is not None:
+            return vals
+    
+    return _decode_uleb128_python(buf)
+
+
+# Bytes with the continuation bit set (deleted to count varint terminators)
+_CONTINUATION_BYTES = bytes(range(0x80, 0x100))
+
+def count_uleb128(data, start: int = 0, end: int = None, chunk_size: int = 1 << 20) -> int:
+    """Count the varints in data[start:end] (as decode_uleb128_array would return) in chunks"""
+    if end is None:
+        end = len(data)
+    
+    count = 0
+    for position in range(start, end, chunk_size):
+        chunk = data[position:min(position + chunk_size, end)]
+        count += len(chunk.translate(None, _CONTINUATION_BYTES))
+    
+    # Trailing varint without a terminating byte
+    if end > start and data[end - 1] >= 0x80:
+        count += 1
+    return count
+
+def iter_uleb128_chunks(data, start: int = 0, end: int = None, chunk_size: int = 1 << 20):
+    """
+    Decode data[start:end] like decode_uleb128_array, one chunk of about
+    chunk_size bytes at a time (chunks end on varint boundaries), so only
+    one chunk of values is held at once.
+    """
+    if end is None:
+        end = len(data)
+    
+    position = start
+    while position < end:
+        chunk_end = min(position + chunk_size, end)
+        # Don't split a varint between chunks
+        while chunk_end < end and data[chunk_end - 1] >= 0x80:
+            chunk_end += 1
+        yield decode_uleb128_array(data, position, chunk_end)
+        position = chunk_end
+
 
 class Reader:
-    def __init__(self):
+    def __init__(self, fix_mode: str = 'dict'):
         self.bytes: Optional[bytes] = None
         self.len: int = 0
         self.index: int = 0
@@ -11,6 +166,9 @@ class Reader:
         
         self.MAX_INT32 = 2147483647
         
+        # List/dict element counts, checked against the remaining bytes in strict mode
+        self.read_length = self.read_int
+        
         # Type dispatch table
         self.read_by_type = {
             1: self.read_bool,
@@ -35,14 +193,39 @@ class Reader:
             20: self.read_list_fix3,
             21: self.read_list_fix_quaternion,
         }
+        
+        if fix_mode not in FIX_MODES:
+            raise ValueError(f"Unknown fix mode: {fix_mode}")
+        self.fix_mode = fix_mode
+        
+        if fix_mode == 'tuple':
+            self.read_by_type.update({
+                16: self.read_fix2_tuple,
+                17: self.read_fix3_tuple,
+                18: self.read_fix_quaternion_tuple,
+                19: self.read_list_fix2_tuple,
+                20: self.read_list_fix3_tuple,
+                21: self.read_list_fix_quaternion_tuple,
+            })
+        elif fix_mode == 'packed':
+            self.read_by_type.update({
+                8: self.read_list_fix_packed,
+                16: self.read_fix2_packed,
+                17: self.read_fix3_packed,
+                18: self.read_fix_quaternion_packed,
+                19: self.read_list_fix2_packed,
+                20: self.read_list_fix3_packed,
+                21: self.read_list_fix_quaternion_packed,
+            })
     
     def reset(self, length: int, index: int = 0):
         self.len = length
         self.index = index
     
     def load_bytes(self, data: bytes, length: int = None, index: int = 0):
+        """Load a buffer (bytes, mmap, ...); length is the end offset, index the start"""
         self.bytes = data
-        self.reset(length or len(data), index)
+        self.reset(len(data) if length is None else length, index)
     
     def set_read_column(self, column):
         if self.m_binary_file_folder:
@@ -60,6 +243,20 @@ class Reader:
         """Dispatch to appropriate reader based on type ID"""
         return self.read_by_type[type_id]()  # Call the bound method
     
+    def set_strict(self, strict: bool = True):
+        """
+        Raise ValueError on list/dict counts that can't fit in the remaining
+        bytes (every element takes at least one), instead of padding them.
+        For decoding at an offset that may not be a real row start.
+        """
+        self.read_length = self._read_length_checked if strict else self.read_int
+    
+    def _read_length_checked(self) -> Optional[int]:
+        length = self.read_int()
+        if length and length > self.len - self.index:
+            raise ValueError(f"Element count {length} runs past the end of the data")
+        return length
+    
     def set_index(self, value: int):
         self.index = value
     
@@ -123,12 +320,47 @@ class Reader:
     
     def read_all_uleb128(self) -> List[Optional[int]]:
         """Read all remaining varints from current position"""
-        vals = []
-        while self.index < self.len:
-            v = self.read_uleb128()
-            vals.append(v)
+        vals = self.read_all_uleb128_array()
+        if not isinstance(vals, list):
+            vals = vals.tolist()
+        return [v or None for v in vals]
+    
+    def read_all_uleb128_array(self):
+        """Read all remaining varints from current position as a compact integer array"""
+        vals = decode_uleb128_array(self.bytes, self.index, self.len)
+        self.index = max(self.index, self.len)
         return vals
     
+    def read_uleb128_with_offsets(self, count: int):
+        """
+        Read up to count varints in one pass and return (values, offsets).
+        
+        values follow read_uleb128 (None for 0) and offsets[i] is the byte
+        position where value i starts, so a reader can later jump straight
+        to any of them with set_index.
+        """
+        data = self.bytes
+        end = self.len
+        index = self.index
+        vals = []
+        offsets = []
+        
+        while index < end and len(vals) < count:
+            offsets.append(index)
+            value = 0
+            shift = 0
+            while index < end:
+                b = data[index]
+                index += 1
+                value |= (b & 0x7F) << shift
+                if b < 0x80:
+                    break
+                shift += 7
+            vals.append(value or None)
+        
+        self.index = index
+        return vals, offsets
+    
     def read_sleb128(self) -> Optional[int]:
         """Read a signed LEB128 integer (with sign handling)"""
         value = self.read_uleb128()
@@ -214,9 +446,8 @@ class Reader:
             return None
         
         # Find null terminator
-        try:
-            null_pos = self.bytes.index(b'\x00', position)
-        except ValueError:
+        null_pos = self.bytes.find(b'\x00', position, self.len)
+        if null_pos < 0:
             return None
         
         if null_pos == position:
@@ -240,28 +471,28 @@ class Reader:
 
     
     def read_list_string(self) -> Optional[List[str]]:
-        length = self.read_int()
+        length = self.read_length()
         if not length or length <= 0:
             return None
         
         return [self.read_string() for _ in range(length)]
     
     def read_list_bool(self) -> Optional[List[bool]]:
-        length = self.read_int()
+        length = self.read_length()
         if not length or length <= 0:
             return None
         
         return [self.read_bool() for _ in range(length)]
     
     def read_list_int(self) -> Optional[List[int]]:
-        length = self.read_int()
+        length = self.read_length()
         if not length or length <= 0:
             return None
         
         return [self.read_int() or 0 for _ in range(length)]
     
     def read_list_float(self) -> Optional[List[float]]:
-        length = self.read_int()
+        length = self.read_length()
         if not length or length <= 0:
             return None
         
@@ -269,7 +500,7 @@ class Reader:
     
     
     def read_dic_string_string(self) -> Optional[Dict[str, str]]:
-        length = self.read_int()
+        length = self.read_length()
         if not length or length <= 0:
             return None
         
@@ -282,7 +513,7 @@ class Reader:
         return result
     
     def read_dic_int_int(self) -> Optional[Dict[int, int]]:
-        length = self.read_int()
+        length = self.read_length()
         if not length or length <= 0:
             return None
         
@@ -295,7 +526,7 @@ class Reader:
         return result
     
     def read_dic_int_string(self) -> Optional[Dict[int, str]]:
-        length = self.read_int()
+        length = self.read_length()
         if not length or length <= 0:
             return None
         
@@ -308,7 +539,7 @@ class Reader:
         return result
     
     def read_dic_string_int(self) -> Optional[Dict[str, int]]:
-        length = self.read_int()
+        length = self.read_length()
         if not length or length <= 0:
             return None
         
@@ -321,7 +552,7 @@ class Reader:
         return result
     
     def read_dic_int_float(self) -> Optional[Dict[int, float]]:
-        length = self.read_int()
+        length = self.read_length()
         if not length or length <= 0:
             return None
         
@@ -336,75 +567,196 @@ class Reader:
     
     def read_fix(self) -> Optional[Any]:
         """Read fixed-point number"""
-        value = self.read_int64_variant() or 0
-        exp = 0
+        # Inlined read_int64_variant, this runs once per vector component
+        data = self.bytes
+        index = self.index
+        end = self.len
         
-        if value != 0:
-            if self.index >= self.len:
-                return None
-            
-            combined_byte = self.bytes[self.index]
-            self.index += 1
-            exp = combined_byte & 0x7F
-            negative = combined_byte >> 7
-            
-            if negative == 1:
-                value = -value
+        value = 0
+        shift = 0
+        while index < end:
+            b = data[index]
+            index += 1
+            value |= (b & 0x7F) << shift
+            if b < 0x80:
+                break
+            shift += 7
+        
+        if value == 0:
+            self.index = index
+            return 0
+        
+        if index >= end:
+            self.index = index
+            return None
         
-        return self.fix_parse_ex(value, exp)
+        combined_byte = data[index]
+        self.index = index + 1
+        exp = combined_byte & 0x7F
+        
+        if combined_byte >> 7:
+            value = -value
+        
+        return value / FIX_SCALE[exp] if exp > 0 else value
     
     def fix_parse_ex(self, value: int, exp: int) -> Any:
         """Fixed-point parsing logic"""
-        return value / (10 ** exp) if exp > 0 else value
+        return value / FIX_SCALE[exp] if exp > 0 else value
     
     def read_list_fix(self) -> Optional[List]:
-        length = self.read_int()
+        length = self.read_length()
         if not length or length <= 0:
             return None
         
-        return [self.read_fix() for _ in range(length)]
+        return self.read_fixes(length)
     
     def read_fix2(self) -> Optional[Dict]:
         """Read 2D fixed-point vector"""
-        return {
-            'x': self.read_fix(),
-            'y': self.read_fix()
-        }
+        x, y = self.read_fixes(2)
+        return {'x': x, 'y': y}
     
     def read_list_fix2(self) -> Optional[List]:
-        length = self.read_int()
+        length = self.read_length()
         if not length or length <= 0:
             return None
         
-        return [self.read_fix2() for _ in range(length)]
+        it = iter(self.read_fixes(length * 2))
+        return [{'x': x, 'y': y} for x, y in zip(it, it)]
     
     def read_fix3(self) -> Optional[Dict]:
         """Read 3D fixed-point vector"""
-        return {
-            'x': self.read_fix(),
-            'y': self.read_fix(),
-            'z': self.read_fix()
-        }
+        x, y, z = self.read_fixes(3)
+        return {'x': x, 'y': y, 'z': z}
     
     def read_list_fix3(self) -> Optional[List]:
-        length = self.read_int()
+        length = self.read_length()
         if not length or length <= 0:
             return None
         
-        return [self.read_fix3() for _ in range(length)]
+        it = iter(self.read_fixes(length * 3))
+        return [{'x': x, 'y': y, 'z': z} for x, y, z in zip(it, it, it)]
     
     def read_fix_quaternion(self) -> Optional[Dict]:
         """Read quaternion with fixed-point components"""
-        return {
-            'x': self.read_fix() or 0,
-            'y': self.read_fix() or 0,
-            'z': self.read_fix() or 0,
-            'w': self.read_fix() or 0
-        }
+        x, y, z, w = self.read_fixes(4)
+        return {'x': x or 0, 'y': y or 0, 'z': z or 0, 'w': w or 0}
     
     def read_list_fix_quaternion(self) -> Optional[List]:
-        length = self.read_int()
+        length = self.read_length()
         if not length or length <= 0:
             return None
         
-        return [self.read_fix_quaternion() for _ in range(length)]
\ No newline at end of file
+        it = iter(self.read_fixes(length * 4))
+        return [
+            {'x': x or 0, 'y': y or 0, 'z': z or 0, 'w': w or 0}
+            for x, y, z, w in zip(it, it, it, it)
+        ]
+    
+    def read_fixes(self, count: int) -> List[Any]:
+        """Read count fixed-point numbers in one loop (same values as count read_fix calls)"""
+        data = self.bytes
+        index = self.index
+        end = self.len
+        scale = FIX_SCALE
+        values = []
+        append = values.append
+        
+        for _ in range(count):
+            if index >= end:
+                append(0)
+                continue
+            
+            # Single byte mantissas are the common case
+            value = data[index]
+            index += 1
+            if value >= 0x80:
+                value &= 0x7F
+                shift = 7
+                while index < end:
+                    b = data[index]
+                    index += 1
+                    value |= (b & 0x7F) << shift
+                    if b < 0x80:
+                        break
+                    shift += 7
+            
+            if value == 0:
+                append(0)
+            elif index >= end:
+                append(None)
+            else:
+                combined_byte = data[index]
+                index += 1
+                if combined_byte >> 7:
+                    value = -value
+                exp = combined_byte & 0x7F
+                append(value / scale[exp] if exp else value)
+        
+        self.index = index
+        return values
+    
+    # Compact fix vectors (fix_mode 'tuple')
+    def read_fix2_tuple(self) -> tuple:
+        return tuple(self.read_fixes(2))
+    
+    def read_fix3_tuple(self) -> tuple:
+        return tuple(self.read_fixes(3))
+    
+    def read_fix_quaternion_tuple(self) -> tuple:
+        return tuple([v or 0 for v in self.read_fixes(4)])
+    
+    def _read_list_fix_tuples(self, width: int, zero_missing: bool = False) -> Optional[List[tuple]]:
+        length = self.read_length()
+        if not length or length <= 0:
+            return None
+        
+        values = self.read_fixes(length * width)
+        if zero_missing:
+            values = [v or 0 for v in values]
+        it = iter(values)
+        return list(zip(*[it] * width))
+    
+    def read_list_fix2_tuple(self) -> Optional[List[tuple]]:
+        return self._read_list_fix_tuples(2)
+    
+    def read_list_fix3_tuple(self) -> Optional[List[tuple]]:
+        return self._read_list_fix_tuples(3)
+    
+    def read_list_fix_quaternion_tuple(self) -> Optional[List[tuple]]:
+        return self._read_list_fix_tuples(4, zero_missing=True)
+    
+    # Packed fix values (fix_mode 'packed'), missing components become 0.0
+    def _read_fix_array(self, count: int) -> array:
+        values = self.read_fixes(count)
+        try:
+            return array('d', values)
+        except TypeError:
+            return array('d', [v or 0 for v in values])
+    
+    def _read_list_fix_array(self, width: int) -> Optional[array]:
+        length = self.read_length()
+        if not length or length <= 0:
+            return None
+        
+        return self._read_fix_array(length * width)
+    
+    def read_list_fix_packed(self) -> Optional[array]:
+        return self._read_list_fix_array(1)
+    
+    def read_fix2_packed(self) -> array:
+        return self._read_fix_array(2)
+    
+    def read_fix3_packed(self) -> array:
+        return self._read_fix_array(3)
+    
+    def read_fix_quaternion_packed(self) -> array:
+        return self._read_fix_array(4)
+    
+    def read_list_fix2_packed(self) -> Optional[array]:
+        return self._read_list_fix_array(2)
+    
+    def read_list_fix3_packed(self) -> Optional[array]:
+        return self._read_list_fix_array(3)
+    
+    def read_list_fix_quaternion_packed(self) -> Optional[array]:
+        return self._read_list_fix_array(4)
@@ -0,0 +1,396 @@
+import os
+import sys
+import json
+import socket
+import argparse
+import threading
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+from binary_table import BinaryTable
+
+# Query parameters that aren't column filters
+RESERVED_PARAMS = ('table', 'id', 'columns', 'limit', 'offset')
+
+# Rows sampled per table to estimate its memory use
+SIZE_SAMPLE_ROWS = 200
+
+def estimate_size(obj, _depth=0):
+    """Rough deep size of a decoded value in bytes"""
+    size = sys.getsizeof(obj)
+    if _depth > 4:
+        return size
+    if isinstance(obj, dict):
+        for key, value in obj.items():
+            size += estimate_size(key, _depth + 1) + estimate_size(value, _depth + 1)
+    elif isinstance(obj, (list, tuple)):
+        for value in obj:
+            size += estimate_size(value, _depth + 1)
+    return size
+
+def estimate_rows_size(rows):
+    """Estimate the memory held by a table's rows from a sample"""
+    count = len(rows)
+    if not count:
+        return 0
+    if hasattr(rows, 'data'):
+        # ColumnarRows: typed arrays report their own size
+        return sum(estimate_size(column) if isinstance(column, list) else sys.getsizeof(column)
+                   for column in rows.data)
+    step = max(1, count // SIZE_SAMPLE_ROWS)
+    sample = [rows[i] for i in range(0, count, step)]
+    return sys.getsizeof(rows) + sum(estimate_size(row) for row in sample) * count // len(sample)
+
+def index_key(ctype, value):
+    """Normalize a decoded value for hash lookups (the readers return None for 0/empty)"""
+    if ctype == 1:
+        return bool(value)
+    if ctype == 14:
+        return value or 0
+    if ctype in (3, 15):
+        return float(value or 0)
+    if ctype == 2:
+        return value or ""
+    if value is None:
+        return None
+    return json.dumps(value, sort_keys=True, ensure_ascii=False)
+
+def parse_query_value(ctype, text):
+    """Convert a query string value to the index_key form of a column type"""
+    if ctype == 1:
+        return text.lower() in ('1', 'true', 'yes')
+    if ctype == 14:
+        return int(text)
+    if ctype in (3, 15):
+        return float(text)
+    if ctype == 2:
+        return text
+    return json.dumps(json.loads(text), sort_keys=True, ensure_ascii=False)
+
+class CachedTable:
+    """
+    A loaded table with hash indexes built per column on first query
+    (under the table's own lock, so other tables stay available meanwhile)
+    """
+
+    def __init__(self, name, table):
+        self.name = name
+        self.table = table
+        self.types = {cname: ctype for ctype, cname in table.columns}
+        self.indexes = {}
+        self.lock = threading.Lock()
+        self.rows_size = estimate_rows_size(table.rows)
+        self.index_size = 0
+
+    @property
+    def size(self):
+        return self.rows_size + self.index_size
+
+    def index(self, column):
+        """Get the value -> [row number] index of a column, building it if needed"""
+        index = self.indexes.get(column)
+        if index is None:
+            ctype = self.types[column]
+            index = {}
+            for i, row in enumerate(self.table.rows):
+                index.setdefault(index_key(ctype, row.get(column)), []).append(i)
+            self.indexes[column] = index
+            self.index_size += sys.getsizeof(index) + sum(sys.getsizeof(rows) for rows in index.values())
+        return index
+
+    def find(self, filters):
+        """Row numbers matching every (column, value) filter, in table order"""
+        matches = None
+        for column, text in filters:
+            key = parse_query_value(self.types[column], text)
+            found = self.index(column).get(key, [])
+            matches = set(found) if matches is None else matches & set(found)
+            if not matches:
+                return []
+        if matches is None:
+            return range(len(self.table.rows))
+        return sorted(matches)
+
+class TableCache:
+    """
+    Tables of a directory loaded on demand and kept in an LRU cache.
+
+    The estimated size of rows plus indexes is kept under max_bytes by
+    evicting the least recently used tables (the table just requested
+    always stays, even if it is bigger than the budget). Tables are parsed
+    outside the cache lock, one load per table at a time, so a slow load
+    doesn't hold up requests for other tables or /stats.
+    """
+
+    def __init__(self, root, max_bytes, columnar=False):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.columnar = columnar
+        self.tables = OrderedDict()
+        self.paths = {}
+        self.loads = 0
+        self.hits = 0
+        self.evictions = 0
+        self.lock = threading.RLock()
+        self.load_locks = {}
+        self.scan()
+
+    def scan(self):
+        """Find every .tab.bytes file under root, named by relative path without extension"""
+        paths = {}
+        for current_dir, _, files in os.walk(self.root):
+            for file in files:
+                if file.endswith('.tab.bytes'):
+                    path = os.path.join(current_dir, file)
+                    name = os.path.relpath(path, self.root)[:-len('.tab.bytes')].replace(os.sep, '/')
+                    paths[name] = path
+        self.paths = paths
+
+    def path_of(self, name):
+        path = self.paths.get(name)
+        if path is None:
+            # New file since the last scan?
+            self.scan()
+            path = self.paths.get(name)
+        if path is None:
+            raise KeyError(name)
+        return path
+
+    def _cached(self, name):
+        with self.lock:
+            entry = self.tables.get(name)
+            if entry is not None:
+                self.hits += 1
+                self.tables.move_to_end(name)
+            return entry
+
+    def get(self, name):
+        """Get a CachedTable, loading it on a miss"""
+        entry = self._cached(name)
+        if entry is not None:
+            return entry
+
+        with self.lock:
+            load_lock = self.load_locks.setdefault(name, threading.Lock())
+        with load_lock:
+            # Loaded by another request while this one waited
+            entry = self._cached(name)
+            if entry is not None:
+                return entry
+
+            try:
+                table = BinaryTable(self.path_of(name), columnar=self.columnar).load()
+                entry = CachedTable(name, table)
+                with self.lock:
+                    self.tables[name] = entry
+                    self.loads += 1
+                    self.trim()
+            finally:
+                with self.lock:
+                    self.load_locks.pop(name, None)
+            return entry
+
+    def peek(self, name):
+        """Get a cached table without loading it or touching the LRU order"""
+        with self.lock:
+            return self.tables.get(name)
+
+    def total_size(self):
+        return sum(entry.size for entry in self.tables.values())
+
+    def trim(self):
+        """Evict least recently used tables until the cache fits in max_bytes"""
+        with self.lock:
+            while len(self.tables) > 1 and self.total_size() > self.max_bytes:
+                self.tables.popitem(last=False)
+                self.evictions += 1
+
+    def stats(self):
+        with self.lock:
+            return {
+                'tables': len(self.paths),
+                'cached': list(self.tables),
+                'cached_bytes': self.total_size(),
+                'max_bytes': self.max_bytes,
+                'loads': self.loads,
+                'hits': self.hits,
+                'evictions': self.evictions,
+            }
+
+def project(row, columns):
+    if not columns:
+        return row
+    return {column: row.get(column) for column in columns}
+
+def query_row_by_id(cache, name, key, columns=None):
+    """
+    Row whose primary key (or Id column) equals key. A table that isn't
+    cached is first tried without loading it: the row is decoded alone
+    with get_by_pk. If that finds nothing the table is loaded and searched
+    like a cached one, so both paths give the same answer.
+    """
+    entry = cache.peek(name)
+    if entry is None:
+        table = BinaryTable(cache.path_of(name), use_mmap=True)
+        try:
+            table.load_header()
+            if table.has_pk and not table.is_tsv:
+                ctype = table.columns[table.pk_idx][0]
+                row = table.get_by_pk(parse_query_value(ctype, key))
+                if row is not None:
+                    return project(row, columns)
+        finally:
+            table.close()
+    entry = cache.get(name)
+
+    table = entry.table
+    if table.has_pk and table.primary_key:
+        column = table.primary_key
+    elif 'Id' in entry.types:
+        column = 'Id'
+    else:
+        raise ValueError(f"{name} has no primary key or Id column")
+
+    with entry.lock:
+        found = entry.find([(column, key)])
+    cache.trim()
+    if not found:
+        return None
+    return project(table.rows[found[0]], columns)
+
+def query_rows(cache, name, filters, columns=None, limit=None, offset=0):
+    """Rows matching every column = value filter, projected to columns"""
+    entry = cache.get(name)
+    for column, _ in filters:
+        if column not in entry.types:
+            raise ValueError(f"Unknown column: {column}")
+    for column in columns or ():
+        if column not in entry.types:
+            raise ValueError(f"Unknown column: {column}")
+
+    with entry.lock:
+        found = entry.find(filters)
+    cache.trim()
+
+    selected = found[offset:offset + limit] if limit is not None else found[offset:]
+    rows = entry.table.rows
+    return len(found), [project(rows[i], columns) for i in selected]
+
+class QueryHandler(BaseHTTPRequestHandler):
+    """
+    GET endpoints (all answer JSON):
+      /tables                                      table names
+      /schema?table=NAME                           columns and row count
+      /row?table=NAME&id=ID[&columns=a,b]          row by primary key / Id
+      /query?table=NAME[&COL=VALUE...][&columns=a,b][&limit=N][&offset=N]
+      /stats                                       cache counters
+    """
+    cache = None
+
+    def address_string(self):
+        # Unix socket clients have no address
+        return self.client_address[0] if self.client_address else 'unix'
+
+    def send_json(self, payload, status=200):
+        body = json.dumps(payload, ensure_ascii=False, default=str).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = parse_qs(url.query, keep_blank_values=True)
+        first = {key: values[0] for key, values in params.items()}
+        columns = [c for c in first.get('columns', '').split(',') if c] or None
+
+        try:
+            if url.path == '/tables':
+                self.cache.scan()
+                self.send_json(sorted(self.cache.paths))
+            elif url.path == '/stats':
+                self.send_json(self.cache.stats())
+            elif url.path == '/schema':
+                entry = self.cache.get(first['table'])
+                table = entry.table
+                self.send_json({
+                    'table': entry.name,
+                    'columns': [{'name': cname, 'type': ctype} for ctype, cname in table.columns],
+                    'primary_key': table.primary_key if table.has_pk else None,
+                    'rows': len(table.rows),
+                })
+            elif url.path == '/row':
+                row = query_row_by_id(self.cache, first['table'], first['id'], columns)
+                if row is None:
+                    self.send_json({'error': f"No row with id {first['id']}"}, 404)
+                else:
+                    self.send_json(row)
+            elif url.path == '/query':
+                filters = [(key, value) for key, values in params.items()
+                           if key not in RESERVED_PARAMS for value in values]
+                limit = int(first['limit']) if 'limit' in first else None
+                offset = int(first.get('offset', 0))
+                total, rows = query_rows(self.cache, first['table'], filters, columns, limit, offset)
+                self.send_json({'total': total, 'rows': rows})
+            else:
+                self.send_json({'error': f"Unknown endpoint: {url.path}"}, 404)
+        except KeyError as e:
+            self.send_json({'error': f"Missing or unknown: {e.args[0]}"}, 404)
+        except ValueError as e:
+            self.send_json({'error': str(e)}, 400)
+        except Exception as e:
+            # Truncated or corrupt table: answer instead of dropping the connection
+            self.send_json({'error': f"{type(e).__name__}: {e}"}, 500)
+
+def unix_http_server(path, handler):
+    """Threading HTTP server on a Unix socket (imported here, Windows has no AF_UNIX)"""
+    from socketserver import ThreadingMixIn, UnixStreamServer
+
+    class ThreadingUnixHTTPServer(ThreadingMixIn, UnixStreamServer):
+        daemon_threads = True
+
+    return ThreadingUnixHTTPServer(path, handler)
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve queries over a directory of PGR .tab.bytes tables")
+    parser.add_argument('input', help="Directory with .tab.bytes files")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--socket', help="Listen on this Unix socket path instead of TCP")
+    parser.add_argument('--max-memory', type=int, default=512,
+                        help="Cache budget for loaded tables in MB (default 512)")
+    parser.add_argument('--columnar', action='store_true', help="Keep tables in columnar storage")
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.input):
+        print(f"Error: '{args.input}' is not a directory")
+        sys.exit(1)
+
+    if args.socket and not hasattr(socket, 'AF_UNIX'):
+        print("Error: --socket needs Unix domain sockets, which this platform doesn't have")
+        sys.exit(1)
+
+    QueryHandler.cache = TableCache(args.input, args.max_memory * 1024 * 1024, args.columnar)
+    print(f"Found {len(QueryHandler.cache.paths)} tables in {args.input}")
+
+    if args.socket:
+        if os.path.exists(args.socket):
+            os.remove(args.socket)
+        server = unix_http_server(args.socket, QueryHandler)
+        print(f"Listening on unix:{args.socket}")
+    else:
+        server = ThreadingHTTPServer((args.host, args.port), QueryHandler)
+        print(f"Listening on http://{args.host}:{args.port}")
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if args.socket and os.path.exists(args.socket):
+            os.remove(args.socket)
+
+if __name__ == "__main__":
+    main()
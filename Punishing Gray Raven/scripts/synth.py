@@ -0,0 +1,205 @@
+import os
+import sys
+import random
+from writer import Writer, StringPool
+
+# Value pools for random cells
+STRINGS = ["", "alpha", "beta", "gamma", "δέλτα", "Skill_Name_Long_Description_Text"]
+INTS = [0, 1, -5, 300, 123456, -2_000_000_000, 2_000_000_000]
+FLOATS = [0.0, 1.0, 1.5, -0.25]
+FIXES = [0, 1, -3, 1.5, -2.25, 1000]
+
+def random_value(ctype, rnd):
+    """Random cell value of a column type, in the form the readers return it"""
+    def s():
+        return rnd.choice(STRINGS)
+
+    def i():
+        return rnd.choice(INTS)
+
+    def f():
+        return rnd.choice(FLOATS)
+
+    def fx():
+        return rnd.choice(FIXES)
+
+    def lst(item):
+        return [item() for _ in range(rnd.randint(0, 3))]
+
+    def dic(key, item):
+        return {key(): item() for _ in range(rnd.randint(0, 3))}
+
+    def vec(keys):
+        return {k: fx() for k in keys}
+
+    generators = {
+        1: lambda: rnd.choice([True, False]),
+        2: s,
+        3: fx,
+        4: lambda: lst(s),
+        5: lambda: lst(lambda: rnd.choice([True, False])),
+        6: lambda: lst(i),
+        7: lambda: lst(f),
+        8: lambda: lst(fx),
+        9: lambda: dic(s, s),
+        10: lambda: dic(i, i),
+        11: lambda: dic(i, s),
+        12: lambda: dic(s, i),
+        13: lambda: dic(i, f),
+        14: i,
+        15: f,
+        16: lambda: vec('xy'),
+        17: lambda: vec('xyz'),
+        18: lambda: vec('xyzw'),
+        19: lambda: lst(lambda: vec('xy')),
+        20: lambda: lst(lambda: vec('xyz')),
+        21: lambda: lst(lambda: vec('xyzw')),
+    }
+    return generators[ctype]()
+
+def random_rows(columns, count, seed=0, id_base=1):
+    """Random rows (lists of cell values); an 'Id' column counts up from id_base"""
+    rnd = random.Random(seed)
+    rows = []
+    for r in range(count):
+        rows.append([
+            id_base + r if name == 'Id' else random_value(ctype, rnd)
+            for ctype, name in columns
+        ])
+    return rows
+
+def build_table(columns, rows, has_pk=True, pk_idx=0, pool_columns=(), columnar_prefix=0, seed=0):
+    """
+    Encode a complete .tab.bytes file.
+
+    columns is a list of (type, name) like BinaryTable.columns and rows a
+    list of value lists. pool_columns holds 0-based indexes of string
+    columns stored in the string pool. columnar_prefix adds that many rows
+    of large metadata varints before the rows (the columnar layout).
+    """
+    rnd = random.Random(seed)
+    pool = StringPool()
+    pool_set = set(pool_columns)
+
+    # Content trunk, remembering where each row starts
+    content = Writer(pool)
+    for _ in range(columnar_prefix * len(columns)):
+        content.write_uleb128(rnd.randint(10_000_000, 2_000_000_000))
+
+    offsets = []
+    for row in rows:
+        offsets.append(len(content))
+        for col_idx, ((ctype, _), value) in enumerate(zip(columns, row)):
+            content.m_is_using_string_pool = col_idx in pool_set
+            content.write(ctype, value)
+
+    # Primary key trunk (one key per row) and row trunk (row start offsets)
+    pk_trunk = Writer(pool)
+    if has_pk:
+        pk_type = columns[pk_idx][0]
+        pk_trunk.m_is_using_string_pool = pk_idx in pool_set
+        for row in rows:
+            pk_trunk.write(pk_type, row[pk_idx])
+
+    row_trunk = Writer()
+    for offset in offsets:
+        row_trunk.write_int(offset)
+
+    # Header
+    header = Writer()
+    header.write_int(len(columns))
+    for ctype, name in columns:
+        header.write_int(ctype)
+        header.write_cstr(name)
+    header.write_bool(has_pk)
+    if has_pk:
+        header.write_int(pk_idx)
+        header.write_int(len(pk_trunk))
+    header.write_int(len(row_trunk))
+    header.write_int(len(rows))
+    header.write_int(len(content))
+
+    out = Writer()
+    out.write_u32_le(len(header))
+    out.buf += header.buf
+    out.buf += pk_trunk.buf
+    out.buf += row_trunk.buf
+    out.buf += content.buf
+
+    if pool_set:
+        out.buf += build_pool_trunk(pool, sorted(pool_set))
+
+    return out.getvalue()
+
+def build_pool_trunk(pool, pool_columns):
+    """Encode the string pool trunk that follows the content trunk"""
+    column_map = Writer()
+    for col_idx in pool_columns:
+        column_map.write_int(col_idx)
+
+    pool_content = Writer()
+    offset_trunk = Writer()
+    for value in pool.strings:
+        pool_content.write_cstr(value)
+        offset_trunk.write_int(len(pool_content))
+
+    pool_header = Writer()
+    pool_header.write_int(len(pool_columns))
+    pool_header.write_int(len(pool.strings))
+    pool_header.write_int(len(column_map))
+    pool_header.write_int(len(offset_trunk))
+
+    out = Writer()
+    out.write_u32_le(len(pool_header))
+    out.buf += pool_header.buf + column_map.buf + offset_trunk.buf + pool_content.buf
+    return out.getvalue()
+
+ALL_TYPES = [(t, f"Col{t}") for t in range(1, 22) if t != 14]
+
+# Table shapes covering every parse path: name -> (columns, build_table options, first Id)
+SAMPLE_TABLES = {
+    # _parse_with_varints (ints/bools/floats only)
+    'varints': ([(14, 'Id'), (14, 'Count'), (14, 'Level'), (1, 'IsHidden')], {}, 1),
+    'varints_columnar': ([(14, 'Id'), (14, 'Count'), (14, 'Level')], {'columnar_prefix': 2}, 1_000_001),
+    # _parse_with_reader (inline strings and complex types)
+    'reader_strings': ([(14, 'Id'), (2, 'Name'), (14, 'Value'), (4, 'Tags')], {}, 1),
+    'reader_complex': ([(14, 'Id')] + ALL_TYPES, {}, 1),
+    # _parse_with_reader with string pool columns
+    'string_pool': ([(14, 'Id'), (2, 'Name'), (14, 'Value'), (4, 'Tags'), (11, 'Names')],
+                    {'pool_columns': (1, 3, 4)}, 1),
+    'string_pool_complex': ([(14, 'Id')] + ALL_TYPES, {'pool_columns': (2, 4, 9, 10)}, 1),
+    # No primary key
+    'no_pk': ([(14, 'Count'), (15, 'Rate')], {'has_pk': False}, 1),
+}
+
+def build_sample_table(name, row_count, seed=0):
+    """Build one of SAMPLE_TABLES with row_count random rows"""
+    columns, options, id_base = SAMPLE_TABLES[name]
+    rows = random_rows(columns, row_count, seed, id_base)
+    return build_table(columns, rows, seed=seed, **options)
+
+def write_sample_tables(output_dir, row_count, seed=0):
+    """Write every sample table into output_dir, returns the written paths"""
+    os.makedirs(output_dir, exist_ok=True)
+    paths = []
+    for i, name in enumerate(SAMPLE_TABLES):
+        path = os.path.join(output_dir, f"{name}.tab.bytes")
+        with open(path, 'wb') as f:
+            f.write(build_sample_table(name, row_count, seed + i))
+        paths.append(path)
+    return paths
+
+def main():
+    if len(sys.argv) < 2:
+        print("Usage: python synth.py <output_directory> [row_count]")
+        print("  Writes synthetic .tab.bytes files covering every parse path")
+        return
+
+    output_dir = sys.argv[1]
+    row_count = int(sys.argv[2]) if len(sys.argv) > 2 else 10000
+
+    for path in write_sample_tables(output_dir, row_count):
+        print(f"Wrote {path} ({os.path.getsize(path):,} bytes)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,485 @@
+"""Tests on synthetic tables from synth.py (python -m pytest in this directory)"""
+import io
+import os
+import csv
+import sys
+import json
+import threading
+import urllib.error
+import urllib.request
+import multiprocessing
+
+import pytest
+
+import batch
+import binary_table
+import export
+import reader
+import server
+import synth
+from binary_table import BinaryTable
+from idindex import IdIndex, build_id_index
+from server import TableCache, query_row_by_id
+from writer import Writer
+
+PK_TABLES = ('varints', 'reader_strings', 'reader_complex', 'string_pool', 'string_pool_complex')
+
+@pytest.fixture
+def write_table(tmp_path):
+    """Write table bytes into tmp_path, returns the path"""
+    def write(name, data, directory=tmp_path):
+        path = os.path.join(directory, name)
+        with open(path, 'wb') as f:
+            f.write(data)
+        return path
+    return write
+
+@pytest.fixture
+def sample_path(write_table):
+    """Write one of synth.SAMPLE_TABLES, returns the path"""
+    def write(name, row_count=30, seed=0, **options):
+        return write_table(f"{name}.tab.bytes", synth.build_sample_table(name, row_count, seed), **options)
+    return write
+
+@pytest.fixture(autouse=True)
+def empty_layout_cache():
+    binary_table._layout_cache.clear()
+    yield
+    binary_table._layout_cache.clear()
+
+def fresh_rows(path, **options):
+    """Rows of a table parsed with an empty layout cache"""
+    binary_table._layout_cache.clear()
+    return list(BinaryTable(path, **options).load().rows)
+
+# Varints
+
+def encode_varints(values):
+    writer = Writer()
+    for value in values:
+        writer.write_uleb128(value)
+    return bytes(writer.buf)
+
+@pytest.mark.parametrize('data', [
+    b'\x80', b'\x05\x80', b'\x05\xff', b'\x01\x02\x00', b'\x80\x80\x80', bytes(range(256)),
+    encode_varints([0, 1, 127, 128, 300, 2 ** 35, 2 ** 63 - 1]),
+    encode_varints(range(0, 100_000, 37)) + b'\x80',
+])
+def test_uleb128_backends_agree(data):
+    """The NumPy and pure Python varint decoders agree, trailing continuation bytes included"""
+    np = pytest.importorskip('numpy')
+    expected = list(reader._decode_uleb128_python(data))
+    got = reader._decode_uleb128_numpy(data)
+    if got is not None:
+        assert got.dtype == np.uint64
+        assert got.tolist() == expected
+
+# Layout detection
+
+@pytest.mark.parametrize('columns', [
+    [(14, 'Id'), (14, 'Count'), (14, 'Level')],
+    [(14, 'Id'), (2, 'Name'), (14, 'Level')],
+], ids=['varints', 'reader'])
+def test_layout_cache_any_order(write_table, columns):
+    """Row tables and columnar tables with different metadata lengths share a schema safely"""
+    rows = synth.random_rows(columns, 50, 1, 1_000_001)
+    paths = [write_table("row.tab.bytes", synth.build_table(columns, rows))]
+    for prefix in (20, 30, 20):
+        paths.append(write_table(f"columnar{len(paths)}.tab.bytes",
+                                 synth.build_table(columns, rows, columnar_prefix=prefix)))
+    expected = {path: fresh_rows(path) for path in paths}
+
+    for order in (paths, paths[::-1], paths[1:] + paths[:1]):
+        for low_memory in (False, True):
+            binary_table._layout_cache.clear()
+            for path in order:
+                table = BinaryTable(path, low_memory=low_memory)
+                got = list(table.iter_rows()) if low_memory else table.load().rows
+                assert got == expected[path], f"{os.path.basename(path)} misparsed after {os.path.basename(order[0])}"
+
+@pytest.mark.parametrize('columns, scan', [
+    ([(14, 'Id'), (14, 'Count'), (14, 'Level')], '_is_row_start'),
+    ([(14, 'Id'), (2, 'Name'), (14, 'Level')], '_is_reader_row_start'),
+], ids=['varints', 'reader'])
+def test_layout_cache_skips_scan(write_table, monkeypatch, columns, scan):
+    """A repeat columnar schema takes its row start from the cache instead of scanning"""
+    rows = synth.random_rows(columns, 50, 1, 1_000_001)
+    first = write_table("first.tab.bytes", synth.build_table(columns, rows, columnar_prefix=20))
+    second = write_table("second.tab.bytes", synth.build_table(columns, rows, columnar_prefix=20))
+    BinaryTable(first).load()
+
+    calls = []
+    original = getattr(BinaryTable, scan)
+    def counting(self, vals, start, has_id):
+        calls.append(start)
+        return original(self, vals, start, has_id)
+    monkeypatch.setattr(BinaryTable, scan, counting)
+
+    assert list(BinaryTable(second).load().rows) == fresh_rows(second)
+    assert len(calls) > 2
+    calls.clear()
+    BinaryTable(first).load()
+    BinaryTable(second).load()
+    assert len(calls) <= 4
+
+# Storage modes
+
+@pytest.mark.parametrize('name', list(synth.SAMPLE_TABLES))
+def test_storage_modes_agree(sample_path, name):
+    """Columnar storage, mmap, low_memory streaming and iter_rows give the rows of a plain load"""
+    path = sample_path(name, 40)
+    expected = fresh_rows(path)
+    assert list(BinaryTable(path, columnar=True).load().rows) == expected
+    assert list(BinaryTable(path, use_mmap=True).load().rows) == expected
+    assert list(BinaryTable(path).iter_rows()) == expected
+    assert list(BinaryTable(path, use_mmap=True, low_memory=True).iter_rows()) == expected
+
+@pytest.mark.parametrize('name', list(synth.SAMPLE_TABLES))
+@pytest.mark.parametrize('first', ['load_header', 'get_by_pk', 'iter_rows', 'close'])
+def test_load_after_partial_load(sample_path, name, first):
+    """load() after load_header(), get_by_pk(), iter_rows() or close() gives the same table"""
+    path = sample_path(name)
+    expected = BinaryTable(path).load()
+
+    for use_mmap in (False, True):
+        table = BinaryTable(path, use_mmap=use_mmap)
+        if first == 'load_header':
+            table.load_header()
+        elif first == 'get_by_pk':
+            if table.load_header().has_pk:
+                table.get_by_pk(1)
+        elif first == 'iter_rows':
+            next(table.iter_rows(), None)
+        else:
+            table.load_header().close()
+        table.load()
+        assert table.columns == expected.columns
+        assert list(table.rows) == list(expected.rows)
+        table.close()
+
+@pytest.mark.parametrize('name', ['pool_only', 'string_pool', 'string_pool_complex', 'reader_strings', 'varints'])
+@pytest.mark.parametrize('columnar', [False, True])
+def test_rows_readable_after_close(write_table, sample_path, name, columnar):
+    """Rows of a mapped table stay readable after close(), columnar pool columns included"""
+    if name == 'pool_only':
+        # Only a pooled string column, so nothing decodes its strings while loading
+        columns = [(14, 'Id'), (2, 'Name')]
+        path = write_table("pool_only.tab.bytes",
+                           synth.build_table(columns, synth.random_rows(columns, 30), pool_columns=(1,)))
+    else:
+        path = sample_path(name)
+    expected = fresh_rows(path)
+    table = BinaryTable(path, columnar=columnar, use_mmap=True).load()
+    table.close()
+    assert list(table.rows) == expected
+
+# Primary key lookups
+
+@pytest.mark.parametrize('name', PK_TABLES)
+def test_get_by_pk(sample_path, write_table, name):
+    """get_by_pk finds every row, also when the row trunk offsets are off"""
+    path = sample_path(name, 40)
+    data = open(path, 'rb').read()
+    expected = BinaryTable(path).load()
+    header = BinaryTable(path).load_header()
+
+    bad_offsets = bytearray(data)
+    bad_offsets[header.get_after_primary_key_trunk_position() + 3] ^= 0x05
+    bad_path = write_table(f"{name}_bad_offsets.tab.bytes", bytes(bad_offsets))
+
+    for table_path in (path, bad_path):
+        table = BinaryTable(table_path, use_mmap=True)
+        for row in expected.rows:
+            assert table.get_by_pk(expected.normalize_pk(row[expected.primary_key])) == row
+        assert table.get_by_pk(-12345) is None
+        table.close()
+
+@pytest.mark.parametrize('name', PK_TABLES)
+def test_get_by_pk_rejects_short_key_trunk(sample_path, name):
+    """A primary key trunk that doesn't hold row_count keys raises, get_by_pk falls back to a scan"""
+    path = sample_path(name, 40)
+    expected = BinaryTable(path).load()
+    table = BinaryTable(path).load_header()
+    table.row_count += 1
+    with pytest.raises(ValueError):
+        table.get_primary_key_offsets()
+    row = expected.rows[5]
+    assert table.get_by_pk(row['Id']) == row
+
+@pytest.mark.parametrize('name', ['varints', 'reader_strings', 'string_pool'])
+def test_server_row_cached_and_uncached_agree(sample_path, write_table, tmp_path, name):
+    """The server's /row lookup gives the same answer whether the table is cached or not"""
+    path = sample_path(name, 40)
+    data = open(path, 'rb').read()
+
+    # First key of the primary key trunk no longer matches its row, so
+    # get_by_pk misses it and only a scan of the Id column finds it
+    damaged = bytearray(data)
+    damaged[BinaryTable(path).load_header().get_index_trunk_position()] = 0x7F
+    write_table(f"{name}_bad_pk.tab.bytes", bytes(damaged))
+
+    for table_name in (name, f"{name}_bad_pk"):
+        cached = TableCache(str(tmp_path), 1 << 30)
+        cached.get(table_name)
+        for key in [str(i) for i in range(-1, 45)]:
+            uncached_row = query_row_by_id(TableCache(str(tmp_path), 1 << 30), table_name, key)
+            assert uncached_row == query_row_by_id(cached, table_name, key), f"{table_name}: /row {key}"
+
+@pytest.fixture
+def query_server(tmp_path, monkeypatch):
+    """Serve tmp_path on a free port, returns a GET helper giving (status, JSON)"""
+    monkeypatch.setattr(server.QueryHandler, 'cache', TableCache(str(tmp_path), 1 << 30))
+    monkeypatch.setattr(server.QueryHandler, 'log_message', lambda *args: None)
+    httpd = server.ThreadingHTTPServer(('127.0.0.1', 0), server.QueryHandler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+
+    def get(path, timeout=10):
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{httpd.server_port}{path}", timeout=timeout) as response:
+                return response.status, json.load(response)
+        except urllib.error.HTTPError as e:
+            return e.code, json.load(e)
+    yield get
+    httpd.shutdown()
+    httpd.server_close()
+
+def test_server_corrupt_table_answers_500(write_table, query_server):
+    """A table that fails to parse gets an error response, not a dropped connection"""
+    write_table("broken.tab.bytes", synth.build_sample_table('reader_complex', 30)[:3])
+    status, body = query_server("/schema?table=broken")
+    assert status == 500 and 'error' in body
+    assert query_server("/tables") == (200, ['broken'])
+
+def test_server_load_does_not_block_other_requests(sample_path, query_server, monkeypatch):
+    """While one table is parsed, /stats and other tables are still answered"""
+    sample_path('varints')
+    sample_path('reader_strings')
+    release = threading.Event()
+    loading = threading.Event()
+
+    class SlowTable(BinaryTable):
+        def load(self):
+            if os.path.basename(self.filepath) == 'reader_strings.tab.bytes':
+                loading.set()
+                release.wait(10)
+            return super().load()
+    monkeypatch.setattr(server, 'BinaryTable', SlowTable)
+
+    slow = threading.Thread(target=query_server, args=("/schema?table=reader_strings",))
+    slow.start()
+    try:
+        assert loading.wait(10)
+        assert query_server("/stats", timeout=2)[0] == 200
+        assert query_server("/row?table=varints&id=3", timeout=2)[1]['Id'] == 3
+    finally:
+        release.set()
+        slow.join()
+    assert query_server("/stats")[1]['cached'] == ['reader_strings']
+
+# Export
+
+def export_bytes(path, output_format):
+    f = io.BytesIO()
+    export.export_stream(f, BinaryTable(path), output_format)
+    return f.getvalue()
+
+@pytest.mark.parametrize('name', list(synth.SAMPLE_TABLES))
+def test_tsv_export(sample_path, name):
+    """TSV export holds the header and one line per row with the decoded values"""
+    path = sample_path(name)
+    table = BinaryTable(path).load()
+    lines = list(csv.reader(io.StringIO(export_bytes(path, 'tsv').decode('utf-8')), delimiter='\t'))
+    columns = table.get_column_names()
+    assert lines[0] == columns
+    assert lines[1:] == [["" if row.get(c) is None else str(row.get(c)) for c in columns] for row in table.rows]
+
+@pytest.mark.parametrize('name', list(synth.SAMPLE_TABLES))
+def test_native_export_round_trip(sample_path, tmp_path, name):
+    """read_native gives back the columns and values export collected"""
+    path = sample_path(name)
+    native_path = tmp_path / f"{name}.pgrc"
+    native_path.write_bytes(export_bytes(path, 'native'))
+
+    table = BinaryTable(path).load()
+    columns, values = export.read_native(str(native_path))
+    assert columns == table.columns
+    for (ctype, _), got, expected in zip(columns, values, export.collect_columns(table)):
+        expected = [export._restore_keys(ctype, export._normalize_nested(ctype, v))
+                    if export._native_encoding(ctype) == 'json' else v for v in expected]
+        assert list(got) == expected
+
+@pytest.mark.parametrize('output_format', ['parquet', 'arrow'])
+def test_arrow_export_round_trip(sample_path, tmp_path, output_format):
+    pa = pytest.importorskip('pyarrow')
+    path = sample_path('reader_complex')
+    out = tmp_path / f"table.{output_format}"
+    out.write_bytes(export_bytes(path, output_format))
+    if output_format == 'parquet':
+        import pyarrow.parquet as pq
+        read = pq.read_table(str(out))
+    else:
+        read = pa.ipc.open_file(str(out)).read_all()
+    assert read.equals(export.to_arrow_table(BinaryTable(path)))
+
+@pytest.mark.parametrize('output_format', sorted(export.EXPORT_FORMATS))
+def test_tsv_input_exports_as_tsv(write_table, output_format):
+    """A table that is already TSV has no column types and is written as TSV in every format"""
+    path = write_table("Sha1.tab.bytes", b"Name\tSha1\nfoo\tabc\n")
+    table = BinaryTable(path)
+    assert export.output_extension(table, output_format) == '.tsv'
+    assert export_bytes(path, output_format).replace(b'\r\n', b'\n') == b"Name\tSha1\nfoo\tabc\n"
+
+# Batch
+
+def test_check_manifest(sample_path, tmp_path, monkeypatch):
+    """Inputs are new without a record, unchanged when the content and output match, changed otherwise"""
+    path = sample_path('varints')
+    output = tmp_path / "varints.tsv"
+    output.write_text("x")
+
+    state, fingerprint = batch.check_manifest(None, path)
+    assert state == 'new'
+    record = dict(fingerprint, entry={'output_path': str(output)})
+    assert batch.check_manifest(record, path) == ('unchanged', fingerprint)
+    assert batch.check_manifest(record, path, 'native')[0] == 'changed'
+
+    # Same size and mtime trusts the recorded hash, without reading the file
+    with monkeypatch.context() as patch:
+        patch.setattr(batch, 'file_sha1', None)
+        assert batch.check_manifest(record, path)[0] == 'unchanged'
+
+    # Touched but same content: rehashed and still unchanged
+    os.utime(path, ns=(fingerprint['mtime_ns'] + 10**9, fingerprint['mtime_ns'] + 10**9))
+    assert batch.check_manifest(record, path)[0] == 'unchanged'
+
+    with open(path, 'ab') as f:
+        f.write(b'\0')
+    assert batch.check_manifest(record, path)[0] == 'changed'
+
+    os.remove(output)
+    assert batch.check_manifest(record, path)[0] == 'changed'
+
+def run_batch(monkeypatch, *args):
+    monkeypatch.setattr(sys, 'argv', ['batch.py', *map(str, args)])
+    batch.main()
+    with open(os.path.join(str(args[1]), 'parse_results.json'), encoding='utf-8') as f:
+        return json.load(f)['metadata']
+
+def test_batch_skips_unchanged(tmp_path, monkeypatch, capsys):
+    """A second run skips every unchanged input and re-parses the one that changed"""
+    input_dir = tmp_path / "in"
+    output_dir = tmp_path / "out"
+    paths = synth.write_sample_tables(str(input_dir), 20)
+
+    first = run_batch(monkeypatch, input_dir, output_dir)
+    assert first['new_count'] == len(paths) and first['skipped_count'] == 0
+
+    with open(paths[0], 'wb') as f:
+        f.write(synth.build_sample_table(os.path.basename(paths[0])[:-len('.tab.bytes')], 20, seed=99))
+    second = run_batch(monkeypatch, input_dir, output_dir)
+    assert second['skipped_count'] == first['passed_count'] - 1
+    assert second['changed_count'] == 1
+
+_parse_single_file = batch.parse_single_file
+
+def _crash_on_marker(input_path, *args):
+    """parse_single_file that takes its worker process down on crash.tab.bytes"""
+    if os.path.basename(input_path) == 'crash.tab.bytes':
+        os._exit(3)
+    return _parse_single_file(input_path, *args)
+
+@pytest.mark.skipif(multiprocessing.get_start_method() != 'fork', reason="patches the worker function")
+def test_process_files_survives_dead_worker(tmp_path, monkeypatch):
+    """A worker that dies fails only its own input, the other inputs still parse"""
+    input_dir = tmp_path / "in"
+    paths = synth.write_sample_tables(str(input_dir), 20)
+    crash = input_dir / "crash.tab.bytes"
+    crash.write_bytes(synth.build_sample_table('varints', 20))
+    tab_files = sorted(paths + [str(crash)])
+    monkeypatch.setattr(batch, 'parse_single_file', _crash_on_marker)
+
+    results = list(batch.process_files(tab_files, str(input_dir), str(tmp_path / "out"), jobs=3))
+    assert [i for i, _, _ in results] == list(range(len(tab_files)))
+    for _, filepath, result in results:
+        if filepath == str(crash):
+            assert not result['success'] and result['status'] == 'ERROR'
+        else:
+            assert result['success'], result
+
+# Id index
+
+def test_id_index_lookup_and_resolve(tmp_path):
+    """Every Id of the int keyed tables is found, and resolves to its row"""
+    input_dir = tmp_path / "in"
+    paths = synth.write_sample_tables(str(input_dir), 30)
+    index_path = str(tmp_path / "id_index.pgri")
+    tables, entries, skipped = build_id_index(paths, str(input_dir), index_path)
+    assert skipped == []
+
+    expected = {}
+    for path in paths:
+        table = BinaryTable(path).load()
+        if table.has_pk and table.columns[table.pk_idx][0] == 14:
+            name = os.path.relpath(path, str(input_dir))
+            for row in table.rows:
+                expected.setdefault(table.normalize_pk(row[table.primary_key]), {})[name] = row
+    assert tables == len({name for rows in expected.values() for name in rows})
+    assert entries == sum(len(rows) for rows in expected.values())
+
+    with IdIndex(index_path) as index:
+        for key, rows in expected.items():
+            assert sorted(name for name, _ in index.lookup(key)) == sorted(rows)
+            assert dict(index.resolve(key, str(input_dir))) == rows
+        assert index.lookup(-12345) == []
+
+@pytest.mark.parametrize('name', PK_TABLES)
+def test_scan_primary_key_offsets(sample_path, name):
+    """Decoding the rows finds the offsets the index trunks hold"""
+    table = BinaryTable(sample_path(name, 40))
+    assert table.scan_primary_key_offsets() == table.get_primary_key_offsets()
+
+def test_scan_primary_key_offsets_follows_load(sample_path):
+    """Scanned offsets point at the rows load() returns, detected layout included"""
+    table = BinaryTable(sample_path('varints_columnar', 40))
+    rows = {row['Id']: row for row in table.load().rows}
+    offsets = table.scan_primary_key_offsets()
+    assert set(offsets) == set(rows) - {None}
+    for key, offset in offsets.items():
+        assert table.get_row_at(offset) == rows[key]
+
+def test_id_index_falls_back_to_row_scan(tmp_path, write_table):
+    """Tables whose key trunk doesn't validate are still indexed, broken ones are reported"""
+    data = synth.build_sample_table('reader_strings', 30)
+    path = write_table("damaged.tab.bytes", data)
+    damaged = bytearray(data)
+    # A continuation bit merges the first two keys, so the trunk holds too few
+    damaged[BinaryTable(path).load_header().get_index_trunk_position()] |= 0x80
+    write_table("damaged.tab.bytes", bytes(damaged))
+    with pytest.raises(ValueError):
+        BinaryTable(path).get_primary_key_offsets()
+    broken = write_table("broken.tab.bytes", data[:3])
+
+    index_path = str(tmp_path / "id_index.pgri")
+    tables, entries, skipped = build_id_index([path, broken], str(tmp_path), index_path)
+    assert (tables, entries) == (1, 30)
+    assert [name for name, _ in skipped] == ["broken.tab.bytes"]
+
+    rows = {row['Id']: row for row in BinaryTable(path).load().rows}
+    with IdIndex(index_path) as index:
+        for key, row in rows.items():
+            assert index.resolve(key, str(tmp_path)) == [("damaged.tab.bytes", row)]
+
+def test_id_index_resolve_after_table_changed(tmp_path):
+    """A table rewritten since the index was built is resolved by primary key instead"""
+    input_dir = tmp_path / "in"
+    input_dir.mkdir()
+    path = input_dir / "varints.tab.bytes"
+    path.write_bytes(synth.build_sample_table('reader_strings', 30))
+    index_path = str(tmp_path / "id_index.pgri")
+    build_id_index([str(path)], str(input_dir), index_path)
+
+    path.write_bytes(synth.build_sample_table('reader_strings', 30, seed=5))
+    rows = {row['Id']: row for row in BinaryTable(str(path)).load().rows}
+    with IdIndex(index_path) as index:
+        for key in (1, 15, 30):
+            assert index.resolve(key, str(input_dir)) == [("varints.tab.bytes", rows[key])]
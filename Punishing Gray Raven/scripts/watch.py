@@ -0,0 +1,186 @@
+import os
+import sys
+import time
+import struct
+import select
+import ctypes
+import ctypes.util
+
+# inotify event masks (linux/inotify.h)
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_Q_OVERFLOW = 0x00004000
+IN_ISDIR = 0x40000000
+
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+
+EVENT_HEADER = struct.Struct('iIII')
+
+def _load_inotify():
+    """Get libc with the inotify calls, or None where it isn't available"""
+    if not sys.platform.startswith('linux'):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        libc.inotify_init1
+        libc.inotify_add_watch
+    except (OSError, AttributeError):
+        return None
+    return libc
+
+class TreeWatcher:
+    """
+    Report new or modified files under root whose names end with one of
+    suffixes, in debounced batches.
+
+    Uses inotify on Linux (through libc, no extra packages) and falls back
+    to polling size/mtime snapshots elsewhere or when inotify can't be set
+    up. A batch is emitted once no further change arrived for debounce
+    seconds, so a burst of files from one patch is converted together and
+    a file is only picked up after it was closed (inotify) or stopped
+    changing (polling).
+    """
+
+    def __init__(self, root, suffixes, debounce=2.0, poll_interval=5.0, use_inotify=True):
+        self.root = root
+        self.suffixes = tuple(suffixes)
+        self.debounce = debounce
+        self.poll_interval = poll_interval
+        self.fd = None
+        self.watches = {}
+        self.snapshot = None
+        self.last_scan = 0.0
+
+        libc = _load_inotify() if use_inotify else None
+        if libc is not None:
+            fd = libc.inotify_init1(os.O_CLOEXEC)
+            if fd >= 0:
+                self.libc = libc
+                self.fd = fd
+                self._add_tree(root)
+
+        if self.fd is None:
+            self.snapshot = self._scan()
+            self.last_scan = time.monotonic()
+            # A file counts as settled once a whole scan saw no change
+            self.debounce = max(debounce, poll_interval)
+
+    @property
+    def mode(self):
+        return 'inotify' if self.fd is not None else 'polling'
+
+    def _matches(self, name):
+        return name.endswith(self.suffixes)
+
+    def _walk_files(self, directory):
+        for current_dir, _, files in os.walk(directory):
+            for file in files:
+                if self._matches(file):
+                    yield os.path.join(current_dir, file)
+
+    # inotify backend
+    def _add_tree(self, directory):
+        """Watch directory and everything below it, returns files already inside"""
+        found = []
+        for current_dir, _, files in os.walk(directory):
+            wd = self.libc.inotify_add_watch(self.fd, os.fsencode(current_dir), WATCH_MASK)
+            if wd < 0:
+                err = ctypes.get_errno()
+                print(f"[WARN] Can't watch {current_dir}: {os.strerror(err)}")
+                continue
+            self.watches[wd] = current_dir
+            found.extend(os.path.join(current_dir, f) for f in files if self._matches(f))
+        return found
+
+    def _read_events(self, timeout):
+        """Wait up to timeout seconds for events, returns changed file paths"""
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return set()
+
+        data = os.read(self.fd, 64 * 1024)
+        changed = set()
+        position = 0
+        while position + EVENT_HEADER.size <= len(data):
+            wd, mask, _, name_len = EVENT_HEADER.unpack_from(data, position)
+            position += EVENT_HEADER.size
+            name = os.fsdecode(data[position:position + name_len].rstrip(b'\0'))
+            position += name_len
+
+            if mask & IN_Q_OVERFLOW:
+                # Events were dropped, hand every file to the (skip-aware) converter
+                changed.update(self._walk_files(self.root))
+                continue
+
+            directory = self.watches.get(wd)
+            if directory is None or not name:
+                continue
+            path = os.path.join(directory, name)
+
+            if mask & IN_ISDIR:
+                if mask & (IN_CREATE | IN_MOVED_TO):
+                    changed.update(self._add_tree(path))
+            elif mask & (IN_CLOSE_WRITE | IN_MOVED_TO) and self._matches(name):
+                changed.add(path)
+
+        return changed
+
+    # Polling backend
+    def _scan(self):
+        snapshot = {}
+        for path in self._walk_files(self.root):
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            snapshot[path] = (stat.st_size, stat.st_mtime_ns)
+        return snapshot
+
+    def _poll(self, timeout):
+        """Sleep up to timeout seconds and rescan when due, returns changed file paths"""
+        time.sleep(max(0.0, min(timeout, self.last_scan + self.poll_interval - time.monotonic())))
+        if time.monotonic() - self.last_scan < self.poll_interval:
+            return set()
+
+        snapshot = self._scan()
+        self.last_scan = time.monotonic()
+        changed = {path for path, state in snapshot.items() if self.snapshot.get(path) != state}
+        self.snapshot = snapshot
+        return changed
+
+    def wait(self, timeout):
+        if self.fd is not None:
+            return self._read_events(timeout)
+        return self._poll(timeout)
+
+    def batches(self):
+        """Yield sorted lists of changed files, forever (stop with KeyboardInterrupt)"""
+        pending = set()
+        last_change = 0.0
+        while True:
+            if pending:
+                timeout = max(0.0, last_change + self.debounce - time.monotonic())
+            else:
+                timeout = self.poll_interval
+
+            changed = self.wait(timeout)
+            if changed:
+                pending |= changed
+                last_change = time.monotonic()
+            elif pending and time.monotonic() - last_change >= self.debounce:
+                batch = sorted(path for path in pending if os.path.exists(path))
+                pending = set()
+                if batch:
+                    yield batch
+
+    def close(self):
+        if self.fd is not None:
+            os.close(self.fd)
+            self.fd = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,184 @@
+import struct
+from typing import Optional, List, Dict, Any
+
+class StringPool:
+    """Collects unique strings for a table's string pool trunk"""
+
+    def __init__(self):
+        self.strings: List[str] = []
+        self.index_of: Dict[str, int] = {}
+
+    def add(self, value: str) -> int:
+        index = self.index_of.get(value)
+        if index is None:
+            index = self.index_of[value] = len(self.strings)
+            self.strings.append(value)
+        return index
+
+class Writer:
+    """Encoder mirroring Reader, used to build .tab.bytes files"""
+
+    def __init__(self, pool: Optional[StringPool] = None):
+        self.buf = bytearray()
+        self.m_is_using_string_pool: bool = False
+        self.m_pool = pool
+
+        self.MAX_INT32 = 2147483647
+
+        # Type dispatch table (same ids as Reader.read_by_type)
+        self.write_by_type = {
+            1: self.write_bool,
+            2: self.write_string,
+            3: self.write_fix,
+            4: self.write_list_string,
+            5: self.write_list_bool,
+            6: self.write_list_int,
+            7: self.write_list_float,
+            8: self.write_list_fix,
+            9: self.write_dic_string_string,
+            10: self.write_dic_int_int,
+            11: self.write_dic_int_string,
+            12: self.write_dic_string_int,
+            13: self.write_dic_int_float,
+            14: self.write_int,
+            15: self.write_float,
+            16: self.write_fix2,
+            17: self.write_fix3,
+            18: self.write_fix_quaternion,
+            19: self.write_list_fix2,
+            20: self.write_list_fix3,
+            21: self.write_list_fix_quaternion,
+        }
+
+    def write(self, type_id: int, value: Any):
+        """Dispatch to appropriate writer based on type ID"""
+        self.write_by_type[type_id](value)
+
+    def getvalue(self) -> bytes:
+        return bytes(self.buf)
+
+    def __len__(self):
+        return len(self.buf)
+
+    def write_u8(self, value: int):
+        self.buf.append(value & 0xFF)
+
+    def write_u32_le(self, value: int):
+        self.buf += struct.pack("<I", value)
+
+    def write_cstr(self, value: Optional[str]):
+        self.buf += (value or "").encode('utf-8') + b'\x00'
+
+    def write_uleb128(self, value: Optional[int]):
+        """Write an unsigned LEB128 integer (None is written as 0)"""
+        value = value or 0
+        while True:
+            b = value & 0x7F
+            value >>= 7
+            if value:
+                self.buf.append(b | 0x80)
+            else:
+                self.buf.append(b)
+                return
+
+    def write_int(self, value: Optional[int]):
+        """Write a signed variant integer (negatives as their 32-bit pattern)"""
+        value = value or 0
+        if value < 0:
+            value &= 0xFFFFFFFF
+        self.write_uleb128(value)
+
+    def write_float(self, value: Optional[float]):
+        """Write float encoded as int / 10000"""
+        self.write_int(int(round((value or 0) * 10000)))
+
+    def write_bool(self, value: Optional[bool]):
+        self.write_u8(1 if value else 0)
+
+    def write_string(self, value: Optional[str]):
+        """Write null-terminated string or string pool reference"""
+        if self.m_is_using_string_pool:
+            self.write_int(self.m_pool.add(value or ""))
+        else:
+            self.write_cstr(value)
+
+    def write_fix(self, value: Any):
+        """Write fixed-point number as mantissa + exponent/sign byte"""
+        if not value:
+            self.write_uleb128(0)
+            return
+
+        exp = 0
+        scaled = value
+        while exp < 15 and scaled != int(scaled):
+            exp += 1
+            scaled = value * (10 ** exp)
+
+        self.write_uleb128(int(round(abs(scaled))))
+        self.write_u8(exp | (0x80 if value < 0 else 0))
+
+    def _write_list(self, values: Optional[list], write_item):
+        values = values or []
+        self.write_int(len(values))
+        for item in values:
+            write_item(item)
+
+    def _write_dic(self, values: Optional[dict], write_key, write_value):
+        values = values or {}
+        self.write_int(len(values))
+        for key, item in values.items():
+            write_key(key)
+            write_value(item)
+
+    def write_list_string(self, values):
+        self._write_list(values, self.write_string)
+
+    def write_list_bool(self, values):
+        self._write_list(values, self.write_bool)
+
+    def write_list_int(self, values):
+        self._write_list(values, self.write_int)
+
+    def write_list_float(self, values):
+        self._write_list(values, self.write_float)
+
+    def write_list_fix(self, values):
+        self._write_list(values, self.write_fix)
+
+    def write_dic_string_string(self, values):
+        self._write_dic(values, self.write_string, self.write_string)
+
+    def write_dic_int_int(self, values):
+        self._write_dic(values, self.write_int, self.write_int)
+
+    def write_dic_int_string(self, values):
+        self._write_dic(values, self.write_int, self.write_string)
+
+    def write_dic_string_int(self, values):
+        self._write_dic(values, self.write_string, self.write_int)
+
+    def write_dic_int_float(self, values):
+        self._write_dic(values, self.write_int, self.write_float)
+
+    def _write_vector(self, value: Optional[Dict], keys: str):
+        value = value or {}
+        for key in keys:
+            self.write_fix(value.get(key))
+
+    def write_fix2(self, value):
+        self._write_vector(value, 'xy')
+
+    def write_fix3(self, value):
+        self._write_vector(value, 'xyz')
+
+    def write_fix_quaternion(self, value):
+        self._write_vector(value, 'xyzw')
+
+    def write_list_fix2(self, values):
+        self._write_list(values, self.write_fix2)
+
+    def write_list_fix3(self, values):
+        self._write_list(values, self.write_fix3)
+
+    def write_list_fix_quaternion(self, values):
+        self._write_list(values, self.write_fix_quaternion)